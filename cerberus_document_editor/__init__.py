@@ -1,7 +1,9 @@
 import sys
 try:
     from .editor import MainWindow
-    from .user_page import EditorPage
+    from .user_page import EditorPage, DocumentPickerPage, FileListPage
+    from .workspace import Workspace, DocumentFile
+    from .session import DocumentSession
 except Exception as e:
     print(e, file=sys.stderr)
     ...
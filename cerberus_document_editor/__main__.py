@@ -2,50 +2,270 @@ import sys
 import os
 import argparse
 import json
+import yaml
 import cerberus_document_editor as cde
 from cerberus_document_editor import yaml_parser
+from cerberus_document_editor.workspace import Workspace, DocumentFile, expand_filenames
+from cerberus_document_editor.journal import Journal
+from cerberus_document_editor.parallel import ParallelList
+from cerberus_document_editor.watcher import FileWatcher
+from cerberus_document_editor.schema_cache import SchemaCache
+from cerberus_document_editor.document_cache import DocumentCache
+from cerberus_document_editor.server import SchemaStore, ValidationService, create_server
+from cerberus_document_editor.replay import Replay, generate_document
+from cerberus_document_editor.bulk import BulkImport, BATCH_SIZE, detect_format, parse_path, field_rule, read_rows, write_rows, error_writer
 
 APP_NAME = 'Cerberus Document Editor'
 DESCRIPTION='Document Editor for Cerberus Schema.'
 parser = argparse.ArgumentParser(description=DESCRIPTION)
 parser.add_argument('-v', '--version', action='version', version=cde.__version__)
 parser.add_argument('-s', '--schema', metavar='JSON_FILENAME', type=str, default='.schema.yaml', help='Select external schema file.')
-parser.add_argument('document', metavar='FILENAME', type=str, help='Filename to edit.')
+parser.add_argument('-r', '--roundtrip', action='store_true', help='Keep comments and formatting by patching only changed nodes on save. (YAML only)')
+parser.add_argument('--fast-open', action='store_true', help='Index only top level entries on open and parse large entries when entered. Untouched entries are saved as is. (YAML only)')
+parser.add_argument('--no-cache', action='store_true', help='Disable compiled schema cache and warm-start document cache.')
+parser.add_argument('--no-reload', action='store_true', help='Disable reloading schema on change.')
+parser.add_argument('--no-journal', action='store_true', help='Disable change journal for crash recovery.')
+parser.add_argument('--memory-report', metavar='FILENAME', type=str, help='Write memory report (JSON) on exit.')
+parser.add_argument('--tracemalloc', action='store_true', help='Trace allocations from start. (Top allocations are included in memory report)')
+parser.add_argument('document', metavar='FILENAME', type=str, nargs='+', help='Filename(s) or glob pattern to edit. Many files open an editing session.')
+
+serve_parser = argparse.ArgumentParser(prog='cde serve', description='Serve validation and normalization over newline delimited JSON-RPC.')
+serve_parser.add_argument('-s', '--schema', metavar='JSON_FILENAME', type=str, default='.schema.yaml', help='Default schema file.')
+serve_parser.add_argument('--socket', metavar='PATH', type=str, help='Listen on unix socket.')
+serve_parser.add_argument('--port', metavar='PORT', type=int, default=0, help='Listen on localhost port. (default: random)')
+serve_parser.add_argument('--no-cache', action='store_true', help='Disable compiled schema cache.')
+
+replay_parser = argparse.ArgumentParser(prog='cde replay', description='Replay key script on virtual screen and report latency.')
+replay_parser.add_argument('-s', '--schema', metavar='JSON_FILENAME', type=str, default='.schema.yaml', help='Select external schema file.')
+replay_parser.add_argument('--generate', metavar='SIZE', type=int, help='Edit generated document which has SIZE items in each list and map.')
+replay_parser.add_argument('--screen', metavar='COLSxROWS', type=str, default='120x40', help='Virtual screen size.')
+replay_parser.add_argument('-o', '--output', metavar='FILENAME', type=str, help='Write report to file.')
+replay_parser.add_argument('script', metavar='SCRIPT', type=str, help='Key script. (YAML or JSON)')
+replay_parser.add_argument('document', metavar='FILENAME', type=str, nargs='?', help='Document to edit. (Not saved)')
+
+import_parser = argparse.ArgumentParser(prog='cde import', description='Import rows (JSONL or CSV) into list field of document.')
+import_parser.add_argument('-s', '--schema', metavar='JSON_FILENAME', type=str, default='.schema.yaml', help='Select external schema file.')
+import_parser.add_argument('-f', '--field', metavar='PATH', type=str, default='', help='Dotted path of list field. (e.g. workspace.preps, default: root)')
+import_parser.add_argument('-r', '--roundtrip', action='store_true', help='Keep comments and formatting of document. (YAML only)')
+import_parser.add_argument('--format', choices=['jsonl', 'csv'], help='Format of rows. (default: by extension, jsonl for -)')
+import_parser.add_argument('--replace', action='store_true', help='Replace items instead of appending.')
+import_parser.add_argument('--batch-size', metavar='SIZE', type=int, default=BATCH_SIZE, help='Rows to normalize and validate at once.')
+import_parser.add_argument('--errors', metavar='FILENAME', type=str, help='Write errors of rejected rows (JSONL). (default: stderr)')
+import_parser.add_argument('document', metavar='FILENAME', type=str, help='Document to import into.')
+import_parser.add_argument('rows', metavar='ROWS', type=str, help='Rows file. (- for stdin)')
+
+export_parser = argparse.ArgumentParser(prog='cde export', description='Export items of list field of document as rows (JSONL or CSV).')
+export_parser.add_argument('-s', '--schema', metavar='JSON_FILENAME', type=str, default='.schema.yaml', help='Select external schema file.')
+export_parser.add_argument('-f', '--field', metavar='PATH', type=str, default='', help='Dotted path of list field. (e.g. workspace.preps, default: root)')
+export_parser.add_argument('--format', choices=['jsonl', 'csv'], help='Format of rows. (default: by extension, jsonl for -)')
+export_parser.add_argument('document', metavar='FILENAME', type=str, help='Document to export from.')
+export_parser.add_argument('rows', metavar='ROWS', type=str, help='Rows file. (- for stdout)')
 
 def exit_with_message(message, exitcode=1):
     print(message, file=sys.stderr)
     sys.exit(exitcode)
 
-def main():
-    args = parser.parse_args()
-    if not os.path.exists(args.schema):
-        exit_with_message('Cannot find schema file. [args.schema]')
-    schema_ext = os.path.splitext(args.schema)[1]
-
-    with open(args.schema) as f:
+def read_schema(filename):
+    ''' Return schema and environment variables used by interpolation. '''
+    schema_ext = os.path.splitext(filename)[1]
+    with open(filename) as f:
         if schema_ext.lower() in ['.yaml', '.yml']:
-            schema = yaml_parser.load(f)
+            return yaml_parser.load_with_variables(f, interpolation=True)
         elif schema_ext.lower() == '.json':
-            schema = json.load(f)
+            return json.load(f), {}
         else:
-            exit_with_message('Not support schema file type.')
-
-    doc_ext = os.path.splitext(args.document)[1]
-    if not doc_ext.lower() in ['.yaml', '.yml', '.json']:
-        exit_with_message('Not support document file type.')
-    if os.path.exists(args.document):
-        with open(args.document) as f:
-            try:
-                if doc_ext.lower() in ['.yaml', '.yml']:
-                    document = yaml_parser.load(f)
-                elif doc_ext.lower() == '.json':
-                    document = json.load(f)
-                else:
-                    exit_with_message('Cannot support schema file type.')
-            except:
-                exit_with_message("Failed to load file. (ParseError)")
+            raise TypeError('Not support schema file type.')
+
+def load_schema(filename, cache=None):
+    if cache:
+        return cache.load(filename, read_schema)
+    return read_schema(filename)[0]
+
+def watch_schema(app, filename, cache=None):
+    def reload():
+        try:
+            schema = load_schema(filename, cache)
+        except Exception:
+            app.post_job(app.set_indicator, ('Failed to reload schema.',))
+            return
+        app.post_job(app.reload_schema, (schema,))
+    return FileWatcher(lambda: yaml_parser.dependencies(filename), reload).start()
+
+def confirm(message):
+    try:
+        return input(f'{message} [Y/n] ').strip().lower() in ['', 'y', 'yes']
+    except EOFError:
+        return False
+
+def start_journal(document_file, document):
+    stream = document_file.stream
+    journal = Journal(document_file.filename, multi=bool(stream))
+    recovered = None
+    if journal.exists():
+        recovered = journal.recover(document, loader=stream and stream.document)
+        if recovered is None or not confirm(f'Recover unsaved edits of {document_file.name}?'):
+            recovered = None
+        elif stream:
+            for index, doc in recovered.items():
+                stream.update(index, doc)
+        else:
+            document = recovered
+    journal.start(recovered or document, loader=stream and stream.document, snapshot=recovered is not None)
+    return journal, document
+
+def serve(argv):
+    args = serve_parser.parse_args(argv)
+    cache = None if args.no_cache else SchemaCache()
+    store = SchemaStore(lambda filename: load_schema(filename, cache), args.schema)
+    server = create_server(ValidationService(store), socket_path=args.socket, port=args.port)
+    print(f'Listening on {args.socket or "%s:%d" % server.server_address}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+def replay(argv):
+    args = replay_parser.parse_args(argv)
+    schema = load_schema(args.schema)
+    with open(args.script) as f:
+        script = yaml.load(f, Loader=yaml_parser.Loader)   # Sequence of steps.
+    if args.generate is not None:
+        name, document = 'generated', generate_document(schema, args.generate)
+    elif args.document:
+        document_file = DocumentFile(args.document).load()
+        name, document = document_file.name, document_file.document
     else:
-        document = {}
+        exit_with_message('Document or --generate is required.')
+    cols, rows = map(int, args.screen.lower().split('x'))
+    app = cde.MainWindow(APP_NAME, pagestack=True)
+    report = Replay(app, script, (cols, rows)).run(cde.EditorPage(name, schema, document))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+def open_rows(filename, mode):
+    if filename == '-':
+        return open((sys.stdin if mode == 'r' else sys.stdout).fileno(), mode, newline='', closefd=False)
+    return open(filename, mode, newline='')
+
+def import_rows(argv):
+    args = import_parser.parse_args(argv)
+    schema = load_schema(args.schema)
+    try:
+        format = detect_format(args.rows, args.format)
+        session = cde.DocumentSession.open(args.document, schema, roundtrip=args.roundtrip)
+        path = parse_path(args.field, session.document)
+    except (TypeError, ValueError, KeyError) as e:
+        exit_with_message(str(e))
+    rule = field_rule(schema, session.document, path)
+    if rule.get('type') != 'list':
+        exit_with_message(f'Not a list field. [{args.field}]')
+    if args.replace or not isinstance(session.get(path), list):
+        session.set(path, [], normalize=False)
+    bulk = BulkImport(session.validator, rule.get('schema', {}), args.batch_size)
+    errors = open(args.errors, 'w') if args.errors else sys.stderr
+    try:
+        with open_rows(args.rows, 'r') as f:
+            for operations in bulk.operations(read_rows(f, format, bulk.item_rule), path, len(session.get(path)), error_writer(errors)):
+                session.apply(operations, normalize=False)
+    finally:
+        if args.errors:
+            errors.close()
+    session.save()
+    exit_with_message(f'{bulk.accepted} rows imported, {bulk.rejected} rows rejected.', 1 if bulk.rejected else 0)
+
+def export_rows(argv):
+    args = export_parser.parse_args(argv)
+    schema = load_schema(args.schema)
+    try:
+        format = detect_format(args.rows, args.format)
+        session = cde.DocumentSession.open(args.document, schema)
+        path = parse_path(args.field, session.document)
+    except (TypeError, ValueError, KeyError) as e:
+        exit_with_message(str(e))
+    items = session.get(path)
+    if not isinstance(items, list):
+        exit_with_message(f'Not a list field. [{args.field}]')
+    with open_rows(args.rows, 'w') as f:
+        write_rows(f, format, field_rule(schema, session.document, path).get('schema', {}), items)
+
+def create_app(args):
+    app = cde.MainWindow(APP_NAME, pagestack=True)
+    app.memory_dump = args.memory_report
+    if args.tracemalloc:
+        app.memory.mark()
+    return app
+
+def main():
+    try:
+        if sys.argv[1:2] == ['serve']:
+            return serve(sys.argv[2:])
+        if sys.argv[1:2] == ['replay']:
+            return replay(sys.argv[2:])
+        if sys.argv[1:2] == ['import']:
+            return import_rows(sys.argv[2:])
+        if sys.argv[1:2] == ['export']:
+            return export_rows(sys.argv[2:])
+        return edit(parser.parse_args())
+    finally:
+        ParallelList.shutdown()
+
+def edit(args):
+    if not os.path.exists(args.schema):
+        exit_with_message('Cannot find schema file. [args.schema]')
+    cache = None if args.no_cache else SchemaCache()
+    try:
+        schema = load_schema(args.schema, cache)
+    except TypeError as e:
+        exit_with_message(str(e))
+
+    filenames = expand_filenames(args.document)
+    if not filenames:
+        exit_with_message('Cannot find document file.')
+    if len(filenames) > 1:
+        try:
+            workspace = Workspace(schema, filenames, roundtrip=args.roundtrip)
+        except TypeError as e:
+            exit_with_message(str(e))
+        app = create_app(args)
+        watcher = None if args.no_reload else watch_schema(app, args.schema, cache)
+        workspace.prefetch(0)
+        modified = app.run(cde.FileListPage(f'{len(filenames)} files', workspace))
+        if watcher:
+            watcher.stop()
+        if modified:
+            workspace.save()
+        return
+
+    try:
+        document_file = DocumentFile(filenames[0], roundtrip=args.roundtrip, lazy=args.fast_open)
+    except TypeError as e:
+        exit_with_message(str(e))
+    # Warm start from cache (not for roundtrip and fast-open which need source text).
+    document_cache = None
+    warm = None
+    if not args.no_cache and not args.roundtrip and not args.fast_open:
+        document_cache = DocumentCache(schema)
+        warm = document_cache.load(document_file.filename)
+        if warm:
+            document_file.document = warm['document']
+            document_file.loaded = True
+    try:
+        document_file.load()
+    except:
+        exit_with_message("Failed to load file. (ParseError)")
+    document = document_file.document
+    journal = None
+    if not args.no_journal:
+        journal, document = start_journal(document_file, document)
+    if document is not document_file.document:
+        warm = None     # Recovered from journal.
 
     if False:
         from cerberus_document_editor.validator import Validator
@@ -64,18 +284,38 @@ def main():
         #print(json.dumps(validator.normalized(document, ordered=True), indent=2))
         #print(json.dumps(validator.document, indent=2))
         print(f"{time.time()-b}s")
+    elif document_file.stream:
+        app = create_app(args)
+        app.journal = journal
+        watcher = None if args.no_reload else watch_schema(app, args.schema, cache)
+        modified = app.run(cde.DocumentPickerPage(document_file.name, schema, document_file.stream))
+        if watcher:
+            watcher.stop()
+        if modified:
+            document_file.save(None)
     else:
-        app = cde.MainWindow(APP_NAME, pagestack=True)
-        modified = app.run(cde.EditorPage(os.path.basename(args.document), schema, document))
+        app = create_app(args)
+        app.journal = journal
+        watcher = None if args.no_reload else watch_schema(app, args.schema, cache)
+        if warm:
+            page = cde.EditorPage(document_file.name, schema, document, normalized=warm['normalized'], validated=warm['result'])
+        else:
+            page = cde.EditorPage(document_file.name, schema, document, lazy=document_file.lazy)
+        cold = document_cache and not warm and document is document_file.document and page.session.digest()
+        modified = app.run(page, location=warm and warm['location'])
+        if watcher:
+            watcher.stop()
         if modified:
-            if doc_ext in ['.yaml', '.yml', '.json']:
-                with open(args.document, 'wt') as f:
-                    if doc_ext in ['.yaml', '.yml']:
-                        f.write(yaml_parser.dump(modified))
-                    elif doc_ext in ['.json']:
-                        f.write(json.dumps(modified, indent=2))
-            else:
-                print(f'Cannot support file format.', file=sys.stderr)
+            document_file.save(modified)
+            if document_cache:
+                document_cache.store(document_file.filename, modified, modified, page.session.result)
+        elif cold and cold == page.session.digest() and os.path.exists(document_file.filename):
+            # Exited without change. Stored on exit to keep pickling off the first frame.
+            document_cache.store(document_file.filename, document, page.session.document, page.session.result)
+        if document_cache and os.path.exists(document_file.filename):
+            document_cache.store_location(document_file.filename, app.last_location)
+    if journal:
+        journal.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
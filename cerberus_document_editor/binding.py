@@ -0,0 +1,49 @@
+from .validator import Validator
+
+FIELD = 'value'     # Field name to validate a value alone.
+
+def parse_bool(text):
+    ''' Same as distutils.util.strtobool (removed from Python 3.12). '''
+    value = str(text).strip().lower()
+    if value in ['y', 'yes', 't', 'true', 'on', '1']:
+        return True
+    elif value in ['n', 'no', 'f', 'false', 'off', '0']:
+        return False
+    raise ValueError(f'Invalid truth value. [{text}]')
+
+# Field Binding
+# -- Document key, role and caster of an editable widget
+# -- Field validator is prepared once and shared by bindings of same field schema
+class FieldBinding:
+    def __init__(self, key, role='value', caster=None, schema=None, validators=None, refresh=False):
+        self.key = key
+        self.role = role            # 'kind', 'value' or 'object'
+        self.caster = caster
+        self.schema = schema
+        self.refresh = refresh      # Redraw page after change (e.g. dropdown)
+        self.__validators = {} if validators is None else validators
+
+    def cast(self, value):
+        if self.caster is None:
+            return value
+        try:
+            return self.caster(value)
+        except (ValueError, TypeError, AttributeError):
+            return value
+
+    @property
+    def validator(self):
+        entry = self.__validators.get(id(self.schema))
+        if entry is None:
+            # Keep schema in entry, so id of schema is not reused while cached.
+            entry = self.__validators[id(self.schema)] = (self.schema, Validator({FIELD: self.schema}))
+        return entry[1]
+
+    def validate(self, value):
+        ''' Return errors of value keyed by binding key (empty if valid). '''
+        if not self.schema:
+            return {}
+        validator = self.validator
+        if validator.validate({FIELD: value}, normalize=False):
+            return {}
+        return {self.key: validator.errors.get(FIELD, [])}
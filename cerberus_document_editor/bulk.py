@@ -0,0 +1,166 @@
+import os
+import csv
+import json
+import itertools
+from .validator import flatten_errors, format_error
+from .binding import parse_bool
+
+BATCH_SIZE = 1000
+FORMATS = ['jsonl', 'csv']
+
+def detect_format(filename, format=None):
+    ''' Format of rows file by extension (jsonl for stdin/stdout '-'). '''
+    format = format or ('jsonl' if filename == '-' else os.path.splitext(filename)[1].lower().lstrip('.'))
+    format = {'ndjson': 'jsonl', 'json': 'jsonl'}.get(format, format)
+    if not format in FORMATS:
+        raise TypeError('Not support row file type. (jsonl, csv)')
+    return format
+
+def parse_path(text, document):
+    ''' Dotted path of document (list index as number). '''
+    path, value = [], document
+    for key in [_ for _ in text.split('.') if _] if text else []:
+        if isinstance(value, list):
+            key = int(key)
+        path.append(key)
+        value = value[key] if isinstance(value, list) or key in value else {}
+    return path
+
+def child_rule(rule, value, key):
+    ''' Rule of value[key] from rule of value. '''
+    if rule.get('selector'):
+        kind = str((value or {}).get('kind', '')).lower()
+        return rule['selector'].get(kind, {}).get(key, {})
+    if rule.get('valuesrules'):
+        return rule['valuesrules']
+    dtype = rule.get('type', 'dict')
+    if (dtype[0] if isinstance(dtype, list) else dtype) == 'list':
+        return rule.get('schema', {})
+    return (item_fields(rule) or {}).get(key, {})
+
+def field_rule(schema, document, path):
+    ''' Rule of value at path of document. '''
+    rule = schema['__root__'] if '__root__' in schema else {'type': 'dict', 'schema': schema}
+    value = document
+    for key in path:
+        rule = child_rule(rule, value, key)
+        value = value[key] if isinstance(value, (dict, list)) else None
+    return rule
+
+def item_fields(rule):
+    ''' Field rules of mapping rule (None if not a mapping). '''
+    if rule.get('selector'):
+        return dict({'kind': {'type': 'string'}}, **{k: v for _ in rule['selector'].values() for k, v in _.items()})
+    if rule.get('oneof'):
+        return {k: v for _ in rule['oneof'] for k, v in _.get('schema', {}).items()}
+    if isinstance(rule.get('schema'), dict) and rule.get('type', 'dict') == 'dict':
+        return rule['schema']
+    return None
+
+# Reader / Writer
+def cast(text, rule):
+    ''' Value of CSV cell by type of rule. '''
+    dtype = rule.get('type', 'string')
+    dtype = dtype[0] if isinstance(dtype, list) else dtype
+    if dtype == 'integer':
+        return int(text)
+    elif dtype in ['float', 'number']:
+        return float(text)
+    elif dtype == 'boolean':
+        return parse_bool(text)
+    elif dtype in ['list', 'dict']:
+        return json.loads(text)
+    return text
+
+def read_rows(f, format, item_rule):
+    ''' Yield (row number, item, error) from file object one by one. '''
+    if format == 'jsonl':
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line), None
+                except ValueError as e:
+                    yield number, None, f'Invalid JSON. ({e})'
+    else:
+        fields = item_fields(item_rule)
+        for number, row in enumerate(csv.DictReader(f), 1):
+            try:
+                if fields is None:
+                    yield number, cast(row.get('value', ''), item_rule), None
+                else:
+                    # Empty cell is omitted to be filled by default.
+                    yield number, {k: cast(v, fields.get(k, {})) for k, v in row.items() if k is not None and v != ''}, None
+            except ValueError as e:
+                yield number, None, f'Invalid value. ({e})'
+
+def write_rows(f, format, item_rule, items):
+    ''' Write items one by one, return number of rows. '''
+    count = 0
+    if format == 'jsonl':
+        for item in items:
+            f.write(json.dumps(item) + '\n')
+            count += 1
+        return count
+    fields = item_fields(item_rule)
+    columns = ['value'] if fields is None else sorted(fields, key=lambda k: fields[k].get('order', float('inf')))
+    writer = csv.DictWriter(f, columns, extrasaction='ignore')
+    writer.writeheader()
+    for item in items:
+        item = {'value': item} if fields is None else item
+        writer.writerow({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in item.items()})
+        count += 1
+    return count
+
+# Bulk Import
+# -- Read rows one by one, normalize and validate them in batches
+# -- Report errors per row (row number of input)
+# -- Memory is bounded by batch size (except accepted items)
+class BulkImport:
+    def __init__(self, validator, item_rule, batch_size=BATCH_SIZE):
+        self.validator = validator
+        self.schema = {'__root__': {'type': 'list', 'schema': item_rule}}
+        self.item_rule = item_rule
+        self.batch_size = batch_size
+        self.accepted = 0
+        self.rejected = 0
+
+    def batches(self, rows):
+        ''' Yield list of (row number, item, errors) for each batch of rows. '''
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield self.check(batch)
+
+    def check(self, batch):
+        valid = [(number, item) for number, item, error in batch if error is None]
+        items = json.loads(json.dumps([_[1] for _ in valid]))
+        items = self.validator.normalized(items, json.loads(json.dumps(self.schema)), ordered=True) or items
+        errors = {}
+        if not self.validator.validate(items, json.loads(json.dumps(self.schema)), normalize=False):
+            for path, message in flatten_errors(self.validator.errors):
+                errors.setdefault(path[0] if path else None, []).append(format_error(path[1:], message))
+        normalized = {number: (item, errors.get(index, [])) for index, ((number, _), item) in enumerate(zip(valid, items))}
+        result = [(number,) + normalized[number] if error is None else (number, item, [error]) for number, item, error in batch]
+        self.rejected += len([_ for _ in result if _[2]])
+        self.accepted += len([_ for _ in result if not _[2]])
+        return result
+
+    def operations(self, rows, path, start=0, on_error=None):
+        ''' Yield insert operations of valid rows for each batch (errors of rows are passed to on_error). '''
+        index = start
+        for batch in self.batches(rows):
+            operations = []
+            for number, item, errors in batch:
+                if errors:
+                    if on_error:
+                        on_error(number, errors)
+                else:
+                    operations.append({'op': 'insert', 'path': list(path) + [index], 'new': item})
+                    index += 1
+            yield operations
+
+def error_writer(f):
+    ''' Error handler writing errors of a row as a JSON line. '''
+    return lambda number, errors: f.write(json.dumps({'row': number, 'errors': errors}) + '\n')
@@ -0,0 +1,86 @@
+import os
+import json
+import pickle
+import hashlib
+from .schema_cache import default_cache_dir
+from .debug import log
+
+CACHE_VERSION = 1
+
+# Document Cache
+# -- Normalized document and validation result of recently opened files in pickle
+# -- Keyed by path, contents of file and schema
+# -- Last page stack and focus (location) to reopen where the user left off
+class DocumentCache:
+    def __init__(self, schema, directory=None, capacity=32):
+        self.directory = directory or os.path.join(default_cache_dir(), 'documents')
+        self.capacity = capacity
+        # Digest once, schema is modified by validator while editing (selector).
+        self.schema_digest = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+    def key(self, filename):
+        digest = hashlib.sha256(f'{CACHE_VERSION}:{os.path.abspath(filename)}:{self.schema_digest}'.encode())
+        with open(filename, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def path(self, filename, ext='pickle'):
+        prefix = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f'{prefix}.{ext}')
+
+    def load(self, filename):
+        ''' Return cached entry (document, normalized, result, location) of unchanged file, or None. '''
+        try:
+            key = self.key(filename)
+            with open(self.path(filename), 'rb') as f:
+                entry = pickle.load(f)
+            if entry.get('key') != key:
+                return None
+            entry['location'] = None
+            if os.path.exists(self.path(filename, 'location')):
+                with open(self.path(filename, 'location')) as f:
+                    location = json.load(f)
+                if location['key'] == key:
+                    entry['location'] = location['location']
+            return entry
+        except (OSError, ValueError, pickle.PickleError, EOFError, KeyError):
+            return None
+
+    def store(self, filename, document, normalized, result):
+        try:
+            self.__write(self.path(filename), {
+                'key': self.key(filename),
+                'document': document,
+                'normalized': normalized,
+                'result': result,
+            })
+            self.prune()
+        except Exception as e:
+            log(f'Failed to store document cache: {e}')
+
+    def store_location(self, filename, location):
+        ''' Location is a list of [page name, focused key] from the front page. '''
+        try:
+            self.__write(self.path(filename, 'location'), {'key': self.key(filename), 'location': location}, binary=False)
+        except Exception as e:
+            log(f'Failed to store location: {e}')
+
+    def __write(self, path, data, binary=True):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb' if binary else 'w') as f:
+            if binary:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def prune(self):
+        ''' Keep only recently opened documents. '''
+        names = [_ for _ in os.listdir(self.directory) if _.endswith('.pickle')]
+        if len(names) > self.capacity:
+            paths = sorted([os.path.join(self.directory, _) for _ in names], key=os.path.getmtime)
+            for path in paths[:len(paths)-self.capacity]:
+                for _ in [path, path[:-len('pickle')] + 'location']:
+                    if os.path.exists(_):
+                        os.remove(_)
@@ -1,11 +1,16 @@
+import os
 import sys
 import time
+import queue
 import threading
 import urwid
 import json
 import traceback
 from interrupt_handler import InterruptHandler
 
+from .page import PopupPage
+from .page_cache import PageCache
+from .memory import MemoryReport
 from .debug import log
 
 DEFAULT_PALETTE=[
@@ -18,6 +23,8 @@ DEFAULT_PALETTE=[
     ('combo', 'light gray', 'black'),
     ('focus', 'black', 'white', 'bold'),
     ('stat', 'dark red,bold', 'dark gray'),
+    ('error_label', 'light red,bold', 'dark gray', 'bold'),
+    ('marked_label', 'black', 'yellow', 'bold'),
     ('indicator', 'black', 'light red', 'bold'),
     ('keymap_enable',   'white,bold',       'black'),
     ('keymap_disable',  'dark gray,bold',   'black'),
@@ -32,6 +39,15 @@ class MainWindow:
         self.name = name
         self.stack = []
         self.palette = palette
+        self.journal = None
+        self.page_cache = PageCache()
+        self.memory = MemoryReport(self)
+        self.memory_dump = None     # Filename to write memory report on exit.
+        self.last_location = None   # Location of page stack on exit.
+        self.__modal_bases = []     # Body widgets under modal pages.
+        self.__posted = queue.Queue()   # Jobs from other threads.
+        self.__wakeup = None        # Pipe to wake up main loop for posted jobs.
+        self.__invalidated = False
         self.__pagestack = pagestack
         self.__modified = False
         self.__header_pagestack = urwid.Columns([], dividechars=1)
@@ -111,36 +127,96 @@ class MainWindow:
         else:
             self.loop.set_alarm_in(delay, lambda ctx, user_data: job(*args))
 
+    def post_job(self, job, args=()):
+        ''' Thread-safe add_job. Wake up main loop waiting for input. '''
+        self.__posted.put((job, args))
+        wakeup = self.__wakeup
+        if wakeup is not None:
+            try:
+                os.write(wakeup, b'\n')
+            except OSError:
+                pass    # Main loop is finished.
+
+    def __run_posted(self, data):
+        while not self.__posted.empty():
+            job, args = self.__posted.get()
+            job(*args)
+        return True     # Keep pipe.
+
     def push(self, page):
         page.hwnd = self
+        if page.is_modal and len(self.stack) > 0 and hasattr(page, 'overlay'):
+            # Composite popup over already rendered body.
+            self.__modal_bases.append(self.__body.w)
+            self.stack.append(page)
+            self.update_frame()
+            self.__body.w = page.overlay(self.__modal_bases[-1])
+            return
         self.stack.append(page)
+        if getattr(page, 'view', None) is not None and not page.is_modal:
+            # Restored from page cache, reuse built widgets.
+            self.update_frame()
+            self.__body.w = page.view
+            page.on_change_focus()
+            return
         self.redraw()
 
     def pop(self):
         if len(self.stack) > 1:
             page = self.stack.pop()
-            self.stack[-1].on_page_result(page)
+            page.commit_changes()
+            if page.is_modal and self.__modal_bases:
+                base = self.__modal_bases.pop()
+                self.__invalidated = False
+                self.stack[-1].on_page_result(page)
+                if not self.__invalidated:
+                    # Nothing changed by result, restore body without redrawing page.
+                    self.update_frame()
+                    self.__body.w = base
+                    return
+            else:
+                self.stack[-1].on_page_result(page)
+        self.redraw()
+
+    def reload_schema(self, schema):
+        ''' Apply new schema to pages keeping page stack and documents. '''
+        self.page_cache.clear()
+        parent = None
+        for page in [_ for _ in self.stack if not _.is_modal]:
+            page.on_schema_changed(schema if parent is None else parent.child_schema(page.name))
+            parent = page
         self.redraw()
+        self.set_indicator('Schema reloaded.')
 
     def modified(self):
         self.__modified = True
+        self.__invalidated = True
         self.set_pagestack()
 
     @property
     def front_page(self):
         return json.loads(str(self.stack[0]))
 
+    def update_frame(self):
+        self.__header_pagestack.contents = self.__header_pagestack_contents
+        self.__footer_keymap.contents = self.__footer_keymap_contents
+        self.set_pagestack()
+
     def redraw(self):
         if len(self.stack) > 0:
             try:
                 page = self.stack[-1]
+                page.commit_changes()
                 page.on_update()
-                self.__header_pagestack.contents = self.__header_pagestack_contents
-                self.__footer_keymap.contents = self.__footer_keymap_contents
-                self.set_pagestack()
-                self.__body.w = page.on_draw()
+                self.update_frame()
+                if page.is_modal and self.__modal_bases and hasattr(page, 'overlay'):
+                    self.__body.w = page.overlay(self.__modal_bases[-1])
+                else:
+                    self.__body.w = page.on_draw()
+                self.__invalidated = True
             except Exception as e:
-                self.stack.pop()
+                if self.stack.pop().is_modal and self.__modal_bases:
+                    self.__modal_bases.pop()
                 self.redraw()
                 self.set_indicator('Failed to draw document.')
                 log(traceback.format_exc())
@@ -148,6 +224,7 @@ class MainWindow:
     def input_handler(self, k):
         if len(self.stack):
             page = self.stack[-1]
+            page.commit_changes()
             keymap = page.keymap
             if k in keymap:
                 try:
@@ -158,20 +235,54 @@ class MainWindow:
             elif k in ['ctrl x'] and not page.is_modal:
                 if not self.__modified or not self.stack[-1].on_close():
                     self.destroy()
+            elif k in ['f9'] and not page.is_modal:
+                self.show_memory_report()
+            elif k in ['f10']:
+                self.set_indicator('Memory mark is set.' if self.memory.mark() else 'Memory mark is moved.')
         else:
             self.destroy()
 
+    def show_memory_report(self):
+        self.push(PopupPage('Memory', ptype='message', items=self.memory.lines()))
+
+    @property
+    def location(self):
+        ''' [page name, focused key] of pages in stack (except modal). '''
+        return [[page.name, page.row_keys.get(page.get_focus()) if hasattr(page, 'row_keys') else None]
+            for page in self.stack if not page.is_modal]
+
+    def restore(self, location):
+        ''' Re-enter pages and focus items of location from the front page. '''
+        for index, (name, focus) in enumerate(location):
+            page = self.stack[-1]
+            if index > 0 and not (hasattr(page, 'open_item') and page.open_item(name)):
+                break
+            page = self.stack[-1]
+            if focus is not None and hasattr(page, 'focus_item'):
+                page.focus_item(focus)
+
     def destroy(self, save_exit=True):
+        self.last_location = self.location
+        if self.memory_dump:
+            try:
+                self.memory.dump(self.memory_dump)
+            except Exception as e:
+                log(f'Failed to dump memory report: {e}')
         while len(self.stack) > 1:
             self.stack[-1].close()
         self.save_exit = save_exit
         raise urwid.ExitMainLoop()
 
-    def run(self, start_page):
+    def run(self, start_page, screen=None, location=None):
         self.push(start_page)
+        if location:
+            self.restore(location)
         with InterruptHandler(lambda: True):
-            self.loop = urwid.MainLoop(self.__view, self.palette,
+            self.loop = urwid.MainLoop(self.__view, self.palette, screen=screen,
                 unhandled_input=self.input_handler, pop_ups=True)
+            self.__wakeup = self.loop.watch_pipe(self.__run_posted)
+            if not self.__posted.empty():
+                os.write(self.__wakeup, b'\n')     # Posted before main loop.
             while True:
                 try:
                     self.loop.run()
@@ -183,5 +294,7 @@ class MainWindow:
                         raise e
                 except Exception as e:
                     raise e
+            wakeup, self.__wakeup = self.__wakeup, None
+            self.loop.remove_watch_pipe(wakeup)
         if getattr(self, 'save_exit'):
             return self.front_page
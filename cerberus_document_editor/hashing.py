@@ -0,0 +1,105 @@
+import json
+import hashlib
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _scalar_hash(value):
+    return _digest(b's' + json.dumps(value, sort_keys=True).encode())
+
+# Subtree Hash
+# -- Merkle style hash of each container node (cached)
+# -- Invalidate only nodes along the path of an operation
+# -- Scalars are hashed on demand (not cached)
+class SubtreeHash:
+    def __init__(self, document):
+        self.document = document
+        self.root = {}      # {'hash': bytes, 'children': {key: node} or [node]}
+
+    def __hash(self, value, node):
+        if node.get('hash') is None:
+            if isinstance(value, dict):
+                children = node.get('children')
+                if not isinstance(children, dict):
+                    children = node['children'] = {}
+                digest = hashlib.blake2b(b'd', digest_size=16)
+                for key in sorted(value, key=str):
+                    digest.update(_scalar_hash(key))
+                    digest.update(self.__child(value[key], children, key))
+            elif isinstance(value, list):
+                children = node.get('children')
+                if not isinstance(children, list) or len(children) != len(value):
+                    children = node['children'] = [{} for _ in value]
+                digest = hashlib.blake2b(b'l', digest_size=16)
+                for index, item in enumerate(value):
+                    digest.update(self.__child(item, children, index))
+            else:
+                return _scalar_hash(value)
+            node['hash'] = digest.digest()
+        return node['hash']
+
+    def __child(self, value, children, key):
+        if isinstance(value, (dict, list)):
+            if isinstance(children, dict):
+                return self.__hash(value, children.setdefault(key, {}))
+            return self.__hash(value, children[key])
+        return _scalar_hash(value)
+
+    def digest(self, path=()):
+        ''' Hex digest of sub tree at path. '''
+        value, node = self.document, self.root
+        for key in path:
+            if isinstance(value, list):
+                key = int(key)
+                children = node.get('children')
+                if not isinstance(children, list) or len(children) != len(value):
+                    children = node['children'] = [{} for _ in value]
+                node = children[key]
+            else:
+                children = node.get('children')
+                if not isinstance(children, dict):
+                    children = node['children'] = {}
+                node = children.setdefault(key, {})
+            value = value[key]
+        return self.__hash(value, node).hex()
+
+    def update(self, op, document=None):
+        ''' Invalidate hashes changed by the operation (applied to document already). '''
+        path = op['path']
+        if document is not None:
+            self.document = document
+        if not path:
+            self.root = {}
+            return
+        node = self.root
+        for key in path[:-1]:
+            node['hash'] = None
+            children = node.get('children')
+            if isinstance(children, list):
+                node = children[int(key)] if 0 <= int(key) < len(children) else None
+            else:
+                node = children.get(key) if children is not None else None
+            if node is None:
+                return
+        node['hash'] = None
+        children = node.get('children')
+        if children is None:
+            return
+        key = path[-1]
+        if isinstance(children, list):
+            key = int(key)
+            if op['op'] == 'insert':
+                children.insert(key, {})
+            elif op['op'] == 'delete':
+                children.pop(key)
+            elif op['op'] == 'move':
+                children.insert(int(op['to']), children.pop(key))
+            elif 0 <= key < len(children):
+                children[key] = {}
+            else:
+                node['children'] = None     # e.g. appended by set
+        elif op['op'] == 'rename':
+            if key in children:
+                children[op['new']] = children.pop(key)
+        else:
+            children.pop(key, None)
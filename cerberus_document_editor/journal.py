@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import queue
+import threading
+from .debug import log
+
+def move_to_end(mapping, keys):
+    for key in keys:
+        mapping[key] = mapping.pop(key)
+
+def apply_operation(document, op):
+    ''' Apply a journal operation to the document in place. '''
+    path = op['path']
+    parent = document
+    for key, next_key in zip(path[:-1], path[1:]):
+        if isinstance(parent, list):
+            parent = parent[int(key)]
+        else:
+            if parent.get(key) is None:
+                # Container created by normalization (default) in editor.
+                parent[key] = [] if isinstance(next_key, int) else {}
+            parent = parent[key]
+    key = int(path[-1]) if isinstance(parent, list) else path[-1]
+    if op['op'] == 'set':
+        if isinstance(parent, list) and key == len(parent):
+            parent.append(op['new'])
+        else:
+            parent[key] = op['new']
+    elif op['op'] == 'insert':
+        if isinstance(parent, list):
+            parent.insert(key, op['new'])
+        else:
+            tail = []
+            if op.get('before') in parent:
+                # Keep order of mapping by rotating entries after the position.
+                keys = list(parent)
+                tail = keys[keys.index(op['before']):]
+            parent[key] = op['new']
+            move_to_end(parent, tail)
+    elif op['op'] == 'move':
+        if not isinstance(parent, list):
+            raise ValueError('Cannot move entry of mapping.')
+        parent.insert(int(op['to']), parent.pop(key))
+    elif op['op'] == 'delete':
+        if isinstance(parent, list):
+            parent.pop(key)
+        else:
+            del parent[key]
+    elif op['op'] == 'rename':
+        keys = list(parent)
+        tail = keys[keys.index(key)+1:]
+        parent[op['new']] = parent.pop(key)
+        move_to_end(parent, tail)
+    else:
+        raise ValueError(f"Unknown operation. [{op['op']}]")
+    return document
+
+# Journal
+# -- Append edit operations(path, old, new) to file in background
+# -- Compact to snapshot periodically
+# -- Recover unsaved edits on next launch
+class Journal:
+    def __init__(self, filename, multi=False, compact_every=1000, compact_interval=60.):
+        dirname, basename = os.path.split(os.path.abspath(filename))
+        self.filename = filename
+        self.multi = multi      # Multi-document stream (first path item is document index)
+        self.journal_path = os.path.join(dirname, f'.{basename}.journal')
+        self.snapshot_path = os.path.join(dirname, f'.{basename}.snapshot')
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self.__queue = queue.Queue()
+        self.__worker = None
+        self.__state = None
+        self.__loader = None
+        self.__generation = 0
+
+    @property
+    def source_info(self):
+        if os.path.exists(self.filename):
+            stat = os.stat(self.filename)
+            return {'mtime': stat.st_mtime, 'size': stat.st_size}
+        return {'mtime': None, 'size': None}
+
+    def exists(self):
+        return os.path.exists(self.journal_path) or os.path.exists(self.snapshot_path)
+
+    def recover(self, document=None, loader=None):
+        ''' Return recovered document ({index: document} for multi), None if stale or broken. '''
+        source = self.source_info
+        state = {} if self.multi else json.loads(json.dumps(document))
+        generation = None
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path) as f:
+                    snapshot = json.load(f)
+                if snapshot['source'] != source:
+                    return None
+                generation = snapshot['generation']
+                state = {int(k): v for k, v in snapshot['document'].items()} if self.multi else snapshot['document']
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path) as f:
+                    header = json.loads(f.readline() or 'null')
+                    if not header or header['source'] != source:
+                        return None
+                    if generation is not None and header['generation'] <= generation:
+                        return state    # Already compacted to snapshot.
+                    for line in f:
+                        try:
+                            op = json.loads(line)
+                        except ValueError:
+                            break   # Partially written line by crash.
+                        self.__apply(state, op, loader)
+        except Exception as e:
+            log(f'Failed to recover journal: {e}')
+            return None
+        return state
+
+    def __apply(self, state, op, loader):
+        if self.multi:
+            index = op['path'][0]
+            if not index in state:
+                state[index] = loader(index)
+            apply_operation(state[index], dict(op, path=op['path'][1:]))
+        else:
+            apply_operation(state, op)
+
+    def start(self, document=None, loader=None, snapshot=False):
+        ''' Begin new journal based on the document (or loader for multi). '''
+        self.__state = {} if self.multi else json.loads(json.dumps(document))
+        if self.multi and document:
+            self.__state.update(json.loads(json.dumps(document)))
+            self.__state = {int(k): v for k, v in self.__state.items()}
+        self.__loader = loader
+        self.__generation = 0
+        self.close(discard=True)
+        if snapshot:
+            # Base document is not same with source (e.g. recovered).
+            self.__compact()
+        self.__worker = threading.Thread(target=self.__write_worker, daemon=True)
+        self.__worker.start()
+
+    def record(self, op, path, **kwargs):
+        if self.__worker:
+            self.__queue.put(dict(op=op, path=list(path), **kwargs))
+
+    def close(self, discard=True):
+        if self.__worker:
+            self.__queue.put(None)
+            self.__worker.join()
+            self.__worker = None
+        if discard:
+            for path in [self.journal_path, self.snapshot_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __write_worker(self):
+        f = None
+        count = 0
+        latest = time.time()
+        while True:
+            op = self.__queue.get()
+            if op is None:
+                break
+            try:
+                if f is None:
+                    f = self.__open()
+                line = json.dumps(op)
+                f.write(line + '\n')
+                if self.__queue.empty():
+                    f.flush()
+                self.__apply(self.__state, json.loads(line), self.__loader)
+                count += 1
+                if count >= self.compact_every or (latest + self.compact_interval < time.time() and self.__queue.empty()):
+                    f.close()
+                    self.__compact()
+                    f = None
+                    count, latest = 0, time.time()
+            except Exception as e:
+                log(f'Failed to write journal: {e}')
+        if f:
+            f.close()
+
+    def __open(self):
+        f = open(self.journal_path, 'w')
+        f.write(json.dumps({'source': self.source_info, 'generation': self.__generation}) + '\n')
+        self.__generation += 1
+        return f
+
+    def __compact(self):
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'source': self.source_info, 'generation': self.__generation - 1, 'document': self.__state}, f)
+        os.replace(temp_path, self.snapshot_path)
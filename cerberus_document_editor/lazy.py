@@ -0,0 +1,110 @@
+import re
+import json
+from collections import OrderedDict
+from . import yaml_parser
+from .roundtrip import SourceMap
+
+PENDING = '\0pending'       # Placeholder of subtree which is not materialized yet.
+LAZY_THRESHOLD = 16 * 1024  # Minimum bytes of subtree to materialize lazily.
+
+# Lazy Document
+# -- Index top level entries of block mapping by offset (no parsing)
+# -- Parse large subtrees only when they are requested
+# -- Serialize untouched entries from original text
+class LazyDocument:
+    entry = re.compile(r'^(?P<key>"[^"\n]*"|\'[^\'\n]*\'|[^\s#\-?\'"%][^:\n#]*?|-[^\s:\n#][^:\n#]*?)[ \t]*:(?:[ \t]|$)', re.M)
+    unsupported = re.compile(r'(?:^|[\s\[{,])[&*][^\s\]},]|^<<[ \t]*:|!include\s+|^---|^\.\.\.|^%|^[-?\[{]', re.M)
+
+    def __init__(self, text, roundtrip=False, threshold=LAZY_THRESHOLD):
+        self.text = text
+        self.roundtrip = roundtrip
+        self.entries = OrderedDict()    # key -> (start, end)
+        self.materialized = {}          # key -> value (parsed from source)
+        self.header = ''
+        self.blocks = set()             # Keys of block collection (nothing after colon)
+        self.enabled = not self.unsupported.search(text)
+        if self.enabled:
+            self.__index()
+        if self.enabled:
+            small = [k for k, (start, end) in self.entries.items() if end - start < threshold or not k in self.blocks]
+            if small:
+                values = self.__load(''.join(self.source(_) for _ in small))
+                self.enabled = all(_ in values for _ in small)    # e.g. not string key
+                self.materialized.update((k, values.get(k)) for k in small)
+
+    def __index(self):
+        positions = []
+        seen = set()
+        for line in re.finditer(r'^[^\s#\n].*$', self.text, re.M):
+            matched = self.entry.match(self.text, line.start())
+            if not matched:
+                self.enabled = False    # Not a block mapping.
+                return
+            key = matched.group('key')
+            if key[0] in '"\'':
+                key = key[1:-1]
+            if key in seen:
+                self.enabled = False
+                return
+            seen.add(key)
+            positions.append((key, line.start()))
+            if self.text[matched.end():line.end()].strip()[:1] in ['', '#']:
+                self.blocks.add(key)
+        if not positions:
+            self.enabled = False
+            return
+        self.header = self.text[:positions[0][1]]
+        bounds = [_[1] for _ in positions] + [len(self.text)]
+        for (key, start), end in zip(positions, bounds[1:]):
+            self.entries[key] = (start, end)
+
+    @staticmethod
+    def __load(text):
+        # Not cached (yaml_parser.load) to release large text after parsing.
+        return yaml_parser.load_with_variables(text)[0]
+
+    def source(self, key):
+        start, end = self.entries[key]
+        text = self.text[start:end]
+        return text if text.endswith('\n') else text + '\n'
+
+    def preview(self, key, max_lines=5):
+        lines = [_ for _ in self.source(key).split('\n')[1:] if _.strip()]
+        indent = min([len(_) - len(_.lstrip()) for _ in lines[:max_lines]] or [0])
+        return '\n'.join([_[indent:] for _ in lines[:max_lines]] + (['...'] if len(lines) > max_lines else []))
+
+    def document(self):
+        ''' Root document with placeholders of pending subtrees. '''
+        document = OrderedDict((k, self.materialized[k] if k in self.materialized else PENDING) for k in self.entries)
+        return json.loads(json.dumps(document), object_pairs_hook=OrderedDict)
+
+    def materialize(self, key):
+        if not key in self.materialized:
+            self.materialized[key] = self.__load(self.source(key)).get(key)
+        return self.materialized[key]
+
+    def dumps(self, document):
+        ''' Dump document keeping source of untouched entries. '''
+        pieces = [self.header]
+        for key, value in document.items():
+            if key in self.entries and (value == PENDING or value == self.materialized.get(key, PENDING)):
+                pieces.append(self.source(key))
+            elif key in self.entries and self.roundtrip:
+                source = self.source(key)
+                pieces.append(SourceMap(source).patch({key: self.materialized[key]}, {key: value}) or yaml_parser.dump({key: value}))
+            else:
+                pieces.append(yaml_parser.dump({key: value}))
+        return ''.join(pieces)
+
+def pending_keys(document):
+    if isinstance(document, dict):
+        return [k for k, v in document.items() if v == PENDING]
+    return []
+
+def drop_errors(errors, keys):
+    ''' Remove errors of the (pending) keys from cerberus error tree. '''
+    if '__root__' in errors:
+        items = [drop_errors(_, keys) if isinstance(_, dict) else _ for _ in errors['__root__']]
+        items = [_ for _ in items if _ != {}]
+        return {'__root__': items} if items else {}
+    return {k: v for k, v in errors.items() if not k in keys}
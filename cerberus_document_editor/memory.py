@@ -0,0 +1,97 @@
+import sys
+import json
+import tracemalloc
+import urwid
+
+def estimate_size(obj, seen=None):
+    ''' Estimate bytes of object including referenced containers. '''
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(_, seen) for _ in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+def count_widgets(widget, seen=None):
+    ''' Count widgets in widget tree. '''
+    seen = set() if seen is None else seen
+    if widget is None or id(widget) in seen or not isinstance(widget, urwid.Widget):
+        return 0
+    seen.add(id(widget))
+    children = []
+    if hasattr(widget, 'original_widget'):
+        children.append(widget.original_widget)
+    if isinstance(widget, (urwid.Columns, urwid.Pile)):
+        children += widget.widget_list
+    elif isinstance(widget, urwid.ListBox):
+        children += list(widget.body)
+    elif isinstance(widget, urwid.Frame):
+        children += [widget.header, widget.body, widget.footer]
+    elif isinstance(widget, urwid.Overlay):
+        children += [widget.top_w, widget.bottom_w]
+    return 1 + sum(count_widgets(_, seen) for _ in children)
+
+def page_usage(page):
+    session = getattr(page, 'session', None)
+    validator = getattr(page, 'validator', None)
+    rows = getattr(page, 'listbox_contents', [])
+    return {
+        'name': str(page.name),
+        'type': type(page).__name__,
+        'widgets': sum(count_widgets(_) for _ in rows),
+        'document_bytes': estimate_size(session.document) if session else 0,
+        'schema_bytes': estimate_size(session.schema if session else getattr(page, 'schema', None)),
+        'validator_bytes': estimate_size(vars(validator)) if validator else 0,
+    }
+
+# Memory Report
+# -- Usage of pages in stack (widgets, document, schema, validator)
+# -- Top allocations between two marks (tracemalloc)
+class MemoryReport:
+    def __init__(self, app, top=10):
+        self.app = app
+        self.top = top
+        self.__snapshot = None
+
+    def collect(self):
+        pages = [page_usage(_) for _ in self.app.stack]
+        cache = getattr(self.app, 'page_cache', None)
+        total = {k: sum(_[k] for _ in pages) for k in ['widgets', 'document_bytes', 'schema_bytes', 'validator_bytes']}
+        report = {'pages': pages, 'cached_pages': len(cache) if cache is not None else 0, 'total': total}
+        if self.__snapshot:
+            report['allocations'] = self.allocations()
+        return report
+
+    def mark(self):
+        ''' Take snapshot to compare allocations later. Return True if it is first mark. '''
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        first = self.__snapshot is None
+        self.__snapshot = tracemalloc.take_snapshot()
+        return first
+
+    def allocations(self):
+        ''' Top allocations since latest mark. '''
+        stats = tracemalloc.take_snapshot().compare_to(self.__snapshot, 'lineno')
+        return [{'location': str(_.traceback), 'size_diff': _.size_diff, 'count_diff': _.count_diff} for _ in stats[:self.top]]
+
+    def lines(self, report=None):
+        report = report or self.collect()
+        lines = [f"{'  ' * i}{_['name']} ({_['type']}): {_['widgets']} widgets, document {_['document_bytes']:,}B, "
+                 f"schema {_['schema_bytes']:,}B, validator {_['validator_bytes']:,}B" for i, _ in enumerate(report['pages'])]
+        total = report['total']
+        lines.append(f"Total: {total['widgets']} widgets, document {total['document_bytes']:,}B, "
+                     f"schema {total['schema_bytes']:,}B, validator {total['validator_bytes']:,}B, {report['cached_pages']} cached pages")
+        for _ in report.get('allocations', []):
+            lines.append(f"{_['size_diff']:+,}B ({_['count_diff']:+}) {_['location']}")
+        return lines
+
+    def dump(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.collect(), f, indent=2)
@@ -0,0 +1,35 @@
+import threading
+from collections import deque
+
+# Metrics
+# -- Count, error count and latency percentiles per name (method, key, phase, ...)
+# -- Keep latest samples only
+class Metrics:
+    def __init__(self, samples=1000):
+        self.samples = samples
+        self.__entries = {}
+        self.__lock = threading.Lock()
+
+    def record(self, name, elapsed, failed=False):
+        with self.__lock:
+            entry = self.__entries.setdefault(name, {'count': 0, 'errors': 0, 'latency': deque(maxlen=self.samples)})
+            entry['count'] += 1
+            entry['errors'] += int(failed)
+            entry['latency'].append(elapsed)
+
+    def report(self):
+        def percentile(values, p):
+            return values[min(len(values)-1, int(len(values) * p))] * 1000 if values else None
+        output = {}
+        with self.__lock:
+            for name, entry in self.__entries.items():
+                values = sorted(entry['latency'])
+                output[name] = {
+                    'count': entry['count'],
+                    'errors': entry['errors'],
+                    'p50_ms': percentile(values, .50),
+                    'p95_ms': percentile(values, .95),
+                    'p99_ms': percentile(values, .99),
+                    'max_ms': percentile(values, 1.),
+                }
+        return output
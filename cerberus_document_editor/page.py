@@ -1,6 +1,7 @@
 import urwid
 import json
 import time
+import bisect
 from abc import ABCMeta, abstractmethod
 from cerberus_kind.utils import parse_error
 
@@ -101,6 +102,16 @@ class Page(metaclass=ABCMeta):
     def on_change_focus(self):
         self.warning()
 
+    def commit_changes(self):
+        ''' Apply buffered change events. '''
+
+    def on_schema_changed(self, schema):
+        ...
+
+    def child_schema(self, name):
+        ''' Schema for sub page which is named by name. '''
+        return None
+
     @abstractmethod
     def on_page_result(self, page):
         ...
@@ -120,12 +131,15 @@ class Page(metaclass=ABCMeta):
 class LoopListBox(urwid.ListBox):
     def keypress(self, size, key):
         current_pos = self._get_focus_position()
-        max_pos = len(self.body)-1
+        positions = self.body.positions()
+        if not len(positions):
+            return key
+        min_pos, max_pos = positions[0], positions[-1]
         # def actual_key(unhandled):
         #     if unhandled:
         #         return key
         if self._command_map[key] == 'cursor up':
-            if current_pos == 0:
+            if current_pos == min_pos:
                 key='end'
                 #return actual_key(self._keypress_max_right(size))
         elif self._command_map[key] == 'cursor down':
@@ -134,11 +148,82 @@ class LoopListBox(urwid.ListBox):
                 #return actual_key(self._keypress_max_left(size))
         return urwid.ListBox.keypress(self, size, key)
 
+# Filter Walker
+# -- Walk only visible rows, positions of all rows are kept
+# -- Hidden rows are not rendered
+class FilterWalker(urwid.ListWalker):
+    def __init__(self, contents):
+        self.contents = contents
+        self.rows = range(len(contents))    # Sorted positions of visible rows
+        self.focus = 0
+
+    def __getitem__(self, position):
+        return self.contents[position]
+
+    def __len__(self):
+        return len(self.contents)
+
+    def set_rows(self, rows):
+        self.rows = range(len(self.contents)) if rows is None else rows
+        self.focus = self.nearest(self.focus)
+        self._modified()
+
+    def nearest(self, position):
+        index = bisect.bisect_left(self.rows, position)
+        return self.rows[min(index, len(self.rows)-1)] if len(self.rows) else 0
+
+    def get_focus(self):
+        if not len(self.rows):
+            return None, None
+        return self.contents[self.focus], self.focus
+
+    def set_focus(self, position):
+        self.focus = self.nearest(position)
+        self._modified()
+
+    def next_position(self, position):
+        index = bisect.bisect_right(self.rows, position)
+        if index >= len(self.rows):
+            raise IndexError
+        return self.rows[index]
+
+    def prev_position(self, position):
+        index = bisect.bisect_left(self.rows, position) - 1
+        if index < 0:
+            raise IndexError
+        return self.rows[index]
+
+    def positions(self, reverse=False):
+        return self.rows[::-1] if reverse else self.rows
+
+class FilterEdit(urwid.Edit):
+    ''' Single line edit which leaves to the list by enter or down key. '''
+    def __init__(self, caption, on_leave):
+        super().__init__(caption)
+        self.on_leave = on_leave
+
+    def keypress(self, size, key):
+        if key in ['enter', 'down']:
+            return self.on_leave()
+        return super().keypress(size, key)
+
 class ListPage(Page):
+    change_delay = 0    # Seconds to wait more change events before commit.
+
     def __init__(self, name, sub_page=False):
         super().__init__(name)
         self.listbox_contents = []
         self.widget_map = {}
+        self._pending_changes = {}
+        self.view = None    # Latest drawn widget (reused when page is restored from cache)
+        self.row_keys = {}  # Row position -> item key
+        self.marked = set() # Keys of marked items for bulk operations
+        self.filter_query = None    # Filter text (None if filter is closed)
+        self._filter_index = None   # [(position, text)] of rows to match
+        self._filter_result = None  # Matched subset of index for filter_query
+        self._filter_edit = FilterEdit('/', lambda: self.leave_filter())
+        urwid.connect_signal(self._filter_edit, 'change', lambda widget, text: self.apply_filter(text))
+        self.register_keymap('ctrl f', 'Filter', lambda page: page.open_filter())
         if sub_page:
             self.register_keymap('ctrl left', 'Back', lambda page: page.close())
     
@@ -188,23 +273,168 @@ class ListPage(Page):
         inner_widget = Widget.unwrap_widget(widget)
             
         if not type(inner_widget) in ignore_react_list:
-            signal = urwid.connect_signal(inner_widget, 'change', self.on_change)
+            signal = urwid.connect_signal(inner_widget, 'change', self.on_widget_change)
         return inner_widget
+
+    def on_widget_change(self, widget, new_value):
+        # Coalesce keystrokes(or pasted text) of edit widget and commit once per main loop tick.
+        if not isinstance(widget, urwid.Edit) or not hasattr(self.hwnd, 'loop'):
+            self.commit_changes()
+            return self.on_change(widget, new_value)
+        if not self._pending_changes:
+            self.hwnd.add_job(self.commit_changes, delay=self.change_delay)
+        self._pending_changes[widget] = new_value
+
+    def commit_changes(self):
+        pending, self._pending_changes = self._pending_changes, {}
+        for widget, new_value in pending.items():
+            self.on_change(widget, new_value)
    
     def clear_items(self):
         self.listbox_contents = []
+        self.row_keys = {}
+        self._filter_index = None
+
+    def index_text(self, position):
+        ''' Text of row to match filter. '''
+        try:
+            return str(self.listbox_contents[position].original_widget.widget_list[0].w.text)
+        except (AttributeError, IndexError):
+            return ''
+
+    def filter_index(self):
+        if self._filter_index is None:
+            positions = sorted(self.row_keys) if self.row_keys else \
+                [i for i, _ in enumerate(self.listbox_contents) if _.selectable()]
+            self._filter_index = [(_, self.index_text(_).lower()) for _ in positions]
+        return self._filter_index
+
+    def apply_filter(self, text):
+        ''' Narrow rows incrementally (previous result is refined when text is extended). '''
+        query = text.lower()
+        if self._filter_result is not None and self.filter_query and query.startswith(self.filter_query):
+            candidates = self._filter_result
+        else:
+            candidates = self.filter_index()
+        self._filter_result = [_ for _ in candidates if query in _[1]]
+        self.filter_query = query
+        if isinstance(getattr(self, '_page_widget', None), LoopListBox):
+            self._page_widget.body.set_rows([_[0] for _ in self._filter_result] if query else None)
+        self.warning(f'{len(self._filter_result)} matched.' if query else None, True)
+
+    def open_filter(self):
+        if not isinstance(self.view, urwid.Frame):
+            return
+        if self.filter_query is None:
+            self.filter_query = ''
+            self.view.header = urwid.AttrWrap(self._filter_edit, 'edit', 'focus')
+            self.register_keymap('esc', 'Clear filter', lambda page: page.close_filter())
+            self.hwnd.update_frame()
+        self.view.focus_position = 'header'
+
+    def leave_filter(self):
+        if isinstance(self.view, urwid.Frame) and len(getattr(self._page_widget.body, 'rows', [])):
+            self.view.focus_position = 'body'
+
+    def close_filter(self):
+        self._filter_edit.set_edit_text('')     # Shows all rows.
+        self.filter_query = None
+        self._filter_result = None
+        self.unregister_keymap('esc')
+        if isinstance(self.view, urwid.Frame):
+            self.view.header = None
+            self.view.focus_position = 'body'
+        self.hwnd.update_frame()
+
+    def enable_selection(self):
+        ''' Register keys to mark items for bulk operations. '''
+        self.register_keymap('ctrl t', 'Mark', lambda page: page.toggle_mark())
+        self.register_keymap('shift up', 'Mark up', lambda page: page.mark_range(-1))
+        self.register_keymap('shift down', 'Mark down', lambda page: page.mark_range(1))
+        self.register_keymap('ctrl a', 'Mark all', lambda page: page.mark_all())
+
+    def item_colorscheme(self, key):
+        return 'marked_label' if key in self.marked else 'label'
+
+    def update_mark(self, position):
+        if position in self.row_keys:
+            self.mark_item(position, self.item_colorscheme(self.row_keys[position]))
+
+    def toggle_mark(self):
+        position = self.get_focus()
+        key = self.row_keys.get(position)
+        if key is not None:
+            self.marked.symmetric_difference_update([key])
+            self.update_mark(position)
+            self.warning(f'{len(self.marked)} marked.' if self.marked else None, True)
+
+    def mark_range(self, step):
+        ''' Mark focused item and move focus with marking. '''
+        position = self.get_focus()
+        positions = sorted(self.row_keys)
+        if not position in self.row_keys:
+            return
+        index = max(0, min(len(positions)-1, positions.index(position)+step))
+        for _ in [position, positions[index]]:
+            self.marked.add(self.row_keys[_])
+            self.update_mark(_)
+        self.set_focus(positions[index])
+        self.warning(f'{len(self.marked)} marked.', True)
+
+    def mark_all(self):
+        ''' Mark all items (or clear marks if any). '''
+        self.marked = set() if self.marked else set(self.row_keys.values())
+        for position in self.row_keys:
+            self.update_mark(position)
+        self.warning(f'{len(self.marked)} marked.' if self.marked else None, True)
+
+    def selected_keys(self):
+        ''' Marked keys (in row order), or focused key if nothing is marked. '''
+        if self.marked:
+            return [_ for _ in self.row_keys.values() if _ in self.marked]
+        key = self.row_keys.get(self.get_focus())
+        return [] if key is None else [key]
+
+    def focus_item(self, key):
+        ''' Move focus to the row of key. Return True if found. '''
+        position = next((k for k, v in self.row_keys.items() if v == key), None)
+        if position is None:
+            return False
+        self.set_focus(position)
+        return True
+
+    def open_item(self, key):
+        ''' Focus the row of key and enter its sub page. Return True if entered. '''
+        position = next((k for k, v in self.row_keys.items() if v == key), None)
+        widget = position is not None and Widget.unwrap_widget(self.listbox_contents[position])
+        if not isinstance(widget, urwid.Button):
+            return False    # Not a row of sub page.
+        self.set_focus(position)
+        urwid.emit_signal(widget, 'click', widget)
+        return True
+
+    def mark_item(self, position, colorscheme='error_label'):
+        ''' Change label color of item (e.g. item has error). '''
+        row = self.listbox_contents[position].original_widget
+        if isinstance(row, (urwid.Columns, urwid.Pile)) and isinstance(row.widget_list[0], urwid.AttrWrap):
+            row.widget_list[0].set_attr(colorscheme)
 
     def on_draw(self):
         focus_position = self.get_focus()
         focus_key = self._page_widget._body[focus_position].original_widget.widget_list[0].w.text \
-            if hasattr(self, '_page_widget') else None
+            if hasattr(self, '_page_widget') and focus_position is not None else None
             #log('on_draw', (self._page_widget._body[0].original_widget.widget_list[0].w.text))
             #log('on_draw', dir(self._page_widget._body[0].original_widget.widget_list[0].w.text))
         if len(self.listbox_contents):
-            walker = urwid.SimpleListWalker(self.listbox_contents)
+            walker = FilterWalker(self.listbox_contents)
             urwid.connect_signal(walker, 'modified', self.on_change_focus)
             self._page_widget = LoopListBox(walker)
-            container = self._page_widget
+            container = urwid.Frame(self._page_widget)
+            if self.filter_query is not None:
+                # Keep filter over rebuilt rows.
+                container.header = urwid.AttrWrap(self._filter_edit, 'edit', 'focus')
+                self._filter_result = None
+                self.apply_filter(self._filter_edit.edit_text)
         else:
             container = urwid.Filler(
                 urwid.Padding(
@@ -217,7 +447,8 @@ class ListPage(Page):
                 if focus_key == _.original_widget.widget_list[0].w.text:
                     focus_position = i
                     break
-        self.set_focus(focus_position)
+        self.set_focus(focus_position or 0)
+        self.view = container
         return container
 
     def get_focus(self):
@@ -272,6 +503,9 @@ class PopupPage(Page):
             status_bar = Widget.text(colorscheme='stat')
             self.add_item(status_bar)
             self.status_bar = Widget.unwrap_widget(status_bar)
+        elif ptype == 'message':
+            for line in kwargs.get('items', []):
+                self.add_item(Widget.text(line))
         elif ptype == 'select':
             self.items = kwargs.get('items', [])
             for item in self.items:
@@ -304,14 +538,17 @@ class PopupPage(Page):
     def clear_items(self):
         self.listbox_contents = []
 
-    def on_draw(self):
+    def overlay(self, background):
         return urwid.Overlay(
             urwid.LineBox(urwid.ListBox(urwid.SimpleListWalker(self.listbox_contents))),
-            self.bg_frame,
+            background,
             align='center', width=('relative', 50), min_width=20,
             valign='middle', height=len(self.listbox_contents)+2, min_height=4
         )
 
+    def on_draw(self):
+        return self.overlay(self.bg_frame)
+
     def on_page_result(self, page):
         self.render()
 
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+
+# Page Cache
+# -- Bounded LRU of sub pages with built widgets
+# -- Keyed by document path and schema node
+# -- Entry is valid only for the subtree version when it was stored
+class PageCache:
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.__pages = OrderedDict()    # key -> (version, page)
+
+    def __len__(self):
+        return len(self.__pages)
+
+    def get(self, key, version):
+        entry = self.__pages.get(key)
+        if entry is None:
+            return None
+        if entry[0] != version:
+            del self.__pages[key]   # Subtree is changed.
+            return None
+        self.__pages.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, version, page):
+        self.__pages[key] = (version, page)
+        self.__pages.move_to_end(key)
+        while len(self.__pages) > self.capacity:
+            self.__pages.popitem(last=False)
+
+    def clear(self):
+        self.__pages.clear()
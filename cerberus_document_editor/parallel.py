@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from .validator import Validator
+
+PARALLEL_THRESHOLD = 20000      # Minimum number of items to split a list.
+CHUNK_SIZE = 2500
+
+def cpu_count():
+    ''' Number of CPUs the process is allowed to use (e.g. container, taskset). '''
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Worker process state
+_validator = None
+_prepared = None
+
+def _init_worker(schema):
+    global _validator, _prepared
+    _validator = Validator(schema, purge_unknown=True)
+    _prepared = _validator.schema
+
+def _normalize_chunk(chunk):
+    _validator.schema = _prepared
+    return _validator.normalized(chunk, ordered=True) or chunk
+
+def _validate_chunk(args):
+    offset, chunk = args
+    if _validator.validate(chunk, _prepared, normalize=False):
+        return []
+    # Remap item errors to global indexes.
+    return [{k + offset: v for k, v in _.items()} if isinstance(_, dict) else _ for _ in _validator.errors.get('__root__', [])]
+
+# Parallel List
+# -- Split large list document into chunks
+# -- Normalize and validate chunks with the item schema across a process pool
+# -- List level rules (minlength, ...) are checked in the calling process
+# -- Pools are kept warm until shutdown()
+class ParallelList:
+    __pools = {}    # Schema key -> process pool (workers keep prepared validator)
+    __lock = threading.Lock()
+
+    def __init__(self, schema, workers=None, chunk_size=CHUNK_SIZE, threshold=PARALLEL_THRESHOLD):
+        root = schema['__root__']
+        self.chunk_schema = {'__root__': {'type': 'list', 'schema': root['schema']}}
+        self.list_schema = {'__root__': {k: v for k, v in root.items() if k != 'schema'}}
+        self.validator = Validator(self.list_schema, purge_unknown=True)
+        self.prepared = self.validator.schema
+        self.workers = workers or cpu_count()
+        self.chunk_size = chunk_size
+        self.threshold = threshold
+        self.key = repr(self.chunk_schema)
+
+    @classmethod
+    def for_schema(cls, schema, **kwargs):
+        ''' Return ParallelList if the schema describes a list of items, otherwise None. '''
+        root = schema.get('__root__') if hasattr(schema, 'get') else None
+        if isinstance(root, dict) and root.get('type') == 'list' and isinstance(root.get('schema'), dict):
+            return cls(schema, **kwargs)
+        return None
+
+    def accept(self, document):
+        return isinstance(document, list) and len(document) >= self.threshold and self.workers > 1
+
+    @property
+    def pool(self):
+        with self.__lock:
+            pool = self.__pools.get(self.key)
+            if pool is None:
+                pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.chunk_schema,))
+                self.__pools[self.key] = pool
+            return pool
+
+    @classmethod
+    def shutdown(cls):
+        ''' Stop worker processes of all pools (called by owner on exit). '''
+        with cls.__lock:
+            pools = list(cls.__pools.values())
+            cls.__pools.clear()
+        for pool in pools:
+            pool.shutdown()
+
+    def chunks(self, document):
+        return [(i, document[i:i+self.chunk_size]) for i in range(0, len(document), self.chunk_size)]
+
+    def normalized(self, document):
+        self.validator.schema = self.prepared
+        document = self.validator.normalized(document, ordered=True) or document
+        output = []
+        for chunk in self.pool.map(_normalize_chunk, [_ for i, _ in self.chunks(document)]):
+            output += chunk
+        return output
+
+    def validate(self, document):
+        ''' Return (valid, errors) as same form as validating whole list. '''
+        errors = []
+        if not self.validator.validate(document, self.prepared, normalize=False):
+            errors += self.validator.errors.get('__root__', [])
+        items = {}
+        for chunk_errors in self.pool.map(_validate_chunk, self.chunks(document)):
+            for _ in chunk_errors:
+                if isinstance(_, dict):
+                    items.update(_)
+                else:
+                    errors.append(_)
+        if items:
+            errors.append(items)
+        return not errors, ({'__root__': errors} if errors else {})
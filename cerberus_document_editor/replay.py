@@ -0,0 +1,115 @@
+import time
+from urwid import BaseScreen
+from .metrics import Metrics
+
+# Virtual Screen
+# -- Fixed size screen without terminal (no input descriptors)
+# -- Keep latest drawn canvas
+class VirtualScreen(BaseScreen):
+    def __init__(self, size=(120, 40), on_start=None):
+        super().__init__()
+        self.size = size
+        self.on_start = on_start    # Called from event loop when main loop is started.
+        self.canvas = None
+        self.frames = 0
+
+    def get_cols_rows(self):
+        return self.size
+
+    def hook_event_loop(self, event_loop, callback):
+        if self.on_start:
+            event_loop.alarm(0, self.on_start)
+            self.on_start = None
+
+    def unhook_event_loop(self, event_loop):
+        ...
+
+    def set_mouse_tracking(self, enable=True):
+        ...
+
+    def draw_screen(self, size, canvas):
+        self.canvas = canvas
+        self.frames += 1
+
+    @property
+    def text(self):
+        return '\n'.join(_.decode('utf-8', 'replace') for _ in self.canvas.text) if self.canvas else ''
+
+def expand_script(script):
+    ''' Return list of (phase, key) from script steps. '''
+    keys = []
+    for step in script:
+        if isinstance(step, str):
+            step = {'keys': [step]}
+        phase = step.get('phase', 'default')
+        sequence = list(step.get('keys', [])) + list(step.get('text', ''))
+        keys += [(phase, _) for _ in sequence * step.get('repeat', 1)]
+    return keys
+
+# Replay
+# -- Run MainWindow on virtual screen
+# -- Feed keys of script one by one from main loop
+# -- Measure latency from input to drawn screen (after pending jobs)
+class Replay:
+    def __init__(self, app, script, size=(120, 40)):
+        self.app = app
+        self.keys = expand_script(script)
+        self.screen = VirtualScreen(size, on_start=self.__next)
+        self.phases = Metrics(samples=len(self.keys) or 1)
+        self.key_metrics = Metrics(samples=len(self.keys) or 1)
+        self.total = Metrics(samples=len(self.keys) or 1)
+        self.__position = 0
+
+    def run(self, start_page):
+        self.app.run(start_page, screen=self.screen)
+        return self.report()
+
+    def __next(self):
+        if self.__position >= len(self.keys):
+            return self.app.destroy(False)
+        phase, key = self.keys[self.__position]
+        self.__position += 1
+        begin = time.perf_counter()
+        self.app.loop.process_input([key])
+        # Jobs added by input (e.g. coalesced change) run before this.
+        self.app.add_job(self.__drawn, (phase, key, begin))
+
+    def __drawn(self, phase, key, begin):
+        self.app.loop.draw_screen()
+        elapsed = time.perf_counter() - begin
+        for metrics, name in [(self.phases, phase), (self.key_metrics, key), (self.total, 'total')]:
+            metrics.record(name, elapsed)
+        self.app.add_job(self.__next)
+
+    def report(self):
+        return {
+            'keys': self.key_metrics.report(),
+            'phases': self.phases.report(),
+            'total': self.total.report().get('total'),
+            'frames': self.screen.frames,
+        }
+
+def generate_document(schema, size=100, depth=0):
+    ''' Generate document filled by size items for each list and valuesrules map of schema. '''
+    if '__root__' in schema:
+        return generate_value(schema['__root__'], size, depth)
+    return {k: generate_value(v, size, depth+1) for k, v in schema.items()}
+
+def generate_value(schema, size, depth=0):
+    count = size if depth < 2 else min(size, 3)
+    if schema.get('allowed'):
+        return schema['allowed'][0]
+    if schema.get('selector'):
+        kind = next(iter(schema['selector']))
+        return dict({'kind': kind.title()}, **generate_document(schema['selector'][kind], size, depth))
+    if schema.get('oneof'):
+        return generate_value(dict(schema['oneof'][0], type=schema.get('type', 'dict')), size, depth)
+    dtype = schema.get('type', 'string')
+    dtype = dtype[0] if isinstance(dtype, list) else dtype
+    if dtype == 'list':
+        return [generate_value(schema.get('schema', {}), size, depth+1) for _ in range(count)]
+    elif dtype == 'dict':
+        if 'valuesrules' in schema:
+            return {f'key{i}': generate_value(schema['valuesrules'], size, depth+1) for i in range(count)}
+        return generate_document(schema.get('schema', {}), size, depth)
+    return {'integer': 0, 'float': .0, 'number': .0, 'boolean': False}.get(dtype, 'value')
@@ -0,0 +1,185 @@
+import re
+import yaml
+from .yaml_parser import Loader, Dumper
+
+MERGE_TAG = 'tag:yaml.org,2002:merge'
+
+class Unpatchable(Exception):
+    ''' Raised when a change cannot be expressed as a local source patch. '''
+
+# Source Map
+# -- Node spans of the original text (indexed by document path)
+# -- Patch only changed spans on save
+class SourceMap:
+    def __init__(self, text):
+        self.text = text
+        self.nodes = {}     # path -> (key_node, value_node)
+        self.opaque = set() # paths which cannot be patched (alias, merge key)
+        self.enabled = not re.search(r'!include\s+', text)
+        if self.enabled:
+            try:
+                root = yaml.compose(text, Loader=Loader)
+            except yaml.YAMLError:
+                root = None
+            if root is not None:
+                shared = self._count(root, {})
+                self._index(root, (), None, set(), {_ for _, count in shared.items() if count > 1})
+            else:
+                self.enabled = False
+
+    def _count(self, node, counts):
+        ''' Count references of each node (anchored node is referenced by its aliases). '''
+        counts[id(node)] = counts.get(id(node), 0) + 1
+        if counts[id(node)] == 1:
+            if isinstance(node, yaml.MappingNode):
+                for k, v in node.value:
+                    self._count(v, counts)
+            elif isinstance(node, yaml.SequenceNode):
+                for v in node.value:
+                    self._count(v, counts)
+        return counts
+
+    def _index(self, node, path, key_node, visited, shared):
+        if id(node) in shared:
+            # Patching anchor or alias would change the others too.
+            self.opaque.add(path)
+        if id(node) in visited:
+            return
+        visited.add(id(node))
+        self.nodes[path] = (key_node, node)
+        if isinstance(node, yaml.MappingNode):
+            for k, v in node.value:
+                if k.tag == MERGE_TAG or not isinstance(k, yaml.ScalarNode):
+                    self.opaque.add(path)
+                    continue
+                self._index(v, path + (k.value,), k, visited, shared)
+        elif isinstance(node, yaml.SequenceNode):
+            for i, v in enumerate(node.value):
+                self._index(v, path + (str(i),), None, visited, shared)
+
+    # Span helpers
+    def _end(self, node):
+        if isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) and not node.flow_style and node.value:
+            last = node.value[-1]
+            return self._end(last[1] if isinstance(last, tuple) else last)
+        return node.end_mark.index
+
+    def _line_start(self, pos):
+        return self.text.rfind('\n', 0, pos) + 1
+
+    def _line_end(self, pos):
+        if pos > 0 and self.text[pos-1] == '\n':
+            return pos
+        index = self.text.find('\n', pos)
+        return len(self.text) if index < 0 else index + 1
+
+    def _starts_line(self, pos):
+        return not self.text[self._line_start(pos):pos].strip()
+
+    # Serializers
+    @staticmethod
+    def _flow(value):
+        text = yaml.dump([value], Dumper=Dumper, default_flow_style=True, allow_unicode=True, width=2**31-1, sort_keys=False)
+        return text.strip()[1:-1]
+
+    @staticmethod
+    def _block(value, indent):
+        text = yaml.dump(value, Dumper=Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        return ('\n' + ' ' * indent).join(text.rstrip('\n').split('\n'))
+
+    # Patch
+    def patch(self, original, modified):
+        ''' Return patched source text, or None if a full dump is required. '''
+        if not self.enabled:
+            return None
+        edits = []
+        try:
+            self._diff((), original, modified, edits)
+        except Unpatchable:
+            return None
+        text = self.text
+        for start, end, replacement in sorted(edits, key=lambda x: (x[0], x[1]), reverse=True):
+            text = text[:start] + replacement + text[end:]
+        return text
+
+    def _lookup(self, path):
+        if path in self.opaque or path not in self.nodes:
+            raise Unpatchable(path)
+        return self.nodes[path]
+
+    def _diff(self, path, old, new, edits):
+        if old == new and type(old) == type(new):
+            return
+        key_node, node = self._lookup(path)
+        if isinstance(old, dict) and isinstance(new, dict) and isinstance(node, yaml.MappingNode):
+            self._diff_mapping(path, node, old, new, edits)
+        elif isinstance(old, list) and isinstance(new, list) and isinstance(node, yaml.SequenceNode) and len(old) == len(new):
+            items = []
+            try:
+                for i, (o, n) in enumerate(zip(old, new)):
+                    self._diff(path + (str(i),), o, n, items)
+            except Unpatchable:
+                # Sequence items have no key line, so rewrite the sequence itself.
+                return self._replace(path, key_node, node, new, edits)
+            edits += items
+        else:
+            self._replace(path, key_node, node, new, edits)
+
+    def _replace(self, path, key_node, node, new, edits):
+        trailing = self.text[node.end_mark.index:self._line_end(node.end_mark.index)].strip()
+        inline = isinstance(node, yaml.ScalarNode) and node.style not in ('|', '>')
+        if inline and trailing:
+            # Keep trailing comment on the same line.
+            edits.append((node.start_mark.index, node.end_mark.index, self._flow(new)))
+            return
+        inline |= isinstance(node, (yaml.MappingNode, yaml.SequenceNode)) and bool(node.flow_style)
+        if inline and (not isinstance(new, (dict, list)) or not new or not isinstance(node, yaml.ScalarNode)):
+            edits.append((node.start_mark.index, node.end_mark.index, self._flow(new)))
+        elif key_node is not None and self._starts_line(key_node.start_mark.index):
+            # Rewrite whole entry lines as block style.
+            start, end = key_node.start_mark.index, self._end(node)
+            text = self._block({key_node.value: new}, key_node.start_mark.column)
+            if self.text[end-1:end] == '\n':
+                text += '\n'
+            edits.append((start, end, text))
+        else:
+            raise Unpatchable(path)
+
+    def _diff_mapping(self, path, node, old, new, edits):
+        # Kept keys stay in source order even if reordered (e.g. by normalization).
+        kept = [k for k in new if k in old]
+        reordered = [k for k in old if k in new] != kept
+        removed = [k for k in old if k not in new]
+        added = [k for k in new if k not in old]
+        if (removed or added) and (node.flow_style or not kept):
+            key_node, _ = self._lookup(path)
+            return self._replace(path, key_node, node, new, edits)
+        for k in removed:
+            key_node, value_node = self._lookup(path + (str(k),))
+            if not self._starts_line(key_node.start_mark.index):
+                raise Unpatchable(path)
+            start = self._line_start(key_node.start_mark.index)
+            edits.append((start, self._line_end(self._end(value_node)), ''))
+        inserts = {}
+        # Append new keys after the last kept key when order of source cannot be followed.
+        anchor = [k for k in old if k in new][-1] if reordered else None
+        for k in new:
+            if k in old:
+                if not reordered:
+                    anchor = k
+            elif anchor is None:
+                key_node, _ = self._lookup(path + (str(kept[0]),))
+                if not self._starts_line(key_node.start_mark.index):
+                    raise Unpatchable(path)
+                inserts.setdefault(self._line_start(key_node.start_mark.index), []).append(k)
+            else:
+                _, value_node = self._lookup(path + (str(anchor),))
+                inserts.setdefault(self._line_end(self._end(value_node)), []).append(k)
+        column = inserts and self._lookup(path + (str(kept[0]),))[0].start_mark.column
+        for pos, keys in inserts.items():
+            text = ''.join(' ' * column + self._block({k: new[k]}, column) + '\n' for k in keys)
+            if pos == len(self.text) and not self.text.endswith('\n'):
+                text = '\n' + text
+            edits.append((pos, pos, text))
+        for k in kept:
+            self._diff(path + (str(k),), old[k], new[k], edits)
@@ -0,0 +1,63 @@
+import os
+import sys
+import pickle
+import hashlib
+from . import yaml_parser
+from .validator import Validator
+from .debug import log
+
+CACHE_VERSION = 2
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('CDE_CACHE_DIR') or os.path.join(base, 'cerberus-document-editor')
+
+# Schema Cache
+# -- Resolved(!include, !interp, x- dropped) and prepared schema in pickle
+# -- Keyed by contents of all contributing files
+# -- Invalidated when environment variables used by interpolation are changed
+class SchemaCache:
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_dir()
+
+    def key(self, filename):
+        digest = hashlib.sha256(f'{CACHE_VERSION}:{sys.version_info[:2]}:{os.path.abspath(filename)}'.encode())
+        for path in yaml_parser.dependencies(filename):
+            digest.update(path.encode())
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def path(self, filename, key):
+        prefix = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f'{prefix}-{key}.pickle')
+
+    def load(self, filename, loader):
+        ''' Return schema from cache, or load by loader(filename) -> (schema, variables) and store it. '''
+        path = self.path(filename, self.key(filename))
+        try:
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
+            if all(os.environ.get(k) == v for k, v in cached['variables'].items()):
+                Validator.mark_prepared(cached['expanded'])
+                return cached['schema']
+        except (OSError, pickle.PickleError, EOFError, KeyError):
+            ...
+        schema, variables = loader(filename)
+        try:
+            self.store(path, {'schema': schema, 'variables': variables, 'expanded': Validator.prepare_schema(schema)})
+        except Exception as e:
+            log(f'Failed to store schema cache: {e}')
+        return schema
+
+    def store(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.basename(path).split('-')[0]
+        for name in os.listdir(self.directory):
+            if name.startswith(f'{prefix}-'):
+                os.remove(os.path.join(self.directory, name))   # Stale cache of same schema file.
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import inspect
+import threading
+import socketserver
+from cerberus_kind.utils import parse_error
+from .validator import Validator, flatten_errors
+from .watcher import FileWatcher
+from .metrics import Metrics
+from . import yaml_parser
+from .debug import log
+
+# Schema Store
+# -- Keep parsed and prepared schemas warm (reload when any source file changes)
+# -- Validator per thread (Validator is not thread-safe)
+class SchemaStore:
+    def __init__(self, loader, default=None):
+        self.loader = loader        # loader(filename) -> schema
+        self.default = default
+        self.__schemas = {}         # filename -> (stats, schema, prepared validator)
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def get(self, filename=None):
+        filename = os.path.abspath(filename or self.default)
+        stats = {_: FileWatcher.stat(_) for _ in yaml_parser.dependencies(filename)}
+        with self.__lock:
+            entry = self.__schemas.get(filename)
+            if entry is None or entry[0] != stats:
+                schema = self.loader(filename)
+                entry = (stats, schema, Validator(schema, purge_unknown=True))
+                self.__schemas[filename] = entry
+        return entry
+
+    def validator(self, filename=None):
+        stats, schema, prepared = self.get(filename)
+        validators = self.__local.__dict__.setdefault('validators', {})
+        validator = validators.get(id(prepared))
+        if validator is None:
+            # Share prepared schema, skip schema validation.
+            validator = validators[id(prepared)] = Validator(prepared.schema, purge_unknown=True)
+        return schema, validator
+
+# Validation Service
+# -- JSON-RPC 2.0 methods: validate, normalize, errors, metrics
+class ValidationService:
+    def __init__(self, store):
+        self.store = store
+        self.metrics = Metrics()
+        self.methods = {
+            'validate': self.validate,
+            'normalize': self.normalize,
+            'errors': self.errors,
+            'metrics': lambda: self.metrics.report(),
+        }
+
+    def validate(self, document, schema=None, normalize=True):
+        schema, validator = self.store.validator(schema)
+        if normalize:
+            document = validator.normalized(document, ordered=True) or document
+        valid = validator.validate(document, normalize=False)
+        return {'valid': valid, 'message': '' if valid else parse_error(validator.errors, with_path=True)}
+
+    def normalize(self, document, schema=None):
+        schema, validator = self.store.validator(schema)
+        return validator.normalized(document, ordered=True) or document
+
+    def errors(self, document, schema=None, normalize=True):
+        schema, validator = self.store.validator(schema)
+        if normalize:
+            document = validator.normalized(document, ordered=True) or document
+        if validator.validate(document, normalize=False):
+            return []
+        return [{'path': list(path), 'message': message} for path, message in flatten_errors(validator.errors)]
+
+    def handle(self, request):
+        ''' Handle JSON-RPC request object and return response object (None for notification). '''
+        begin = time.time()
+        method = request.get('method') if isinstance(request, dict) else None
+        method = method if isinstance(method, str) else None
+        response = {'jsonrpc': '2.0', 'id': request.get('id') if isinstance(request, dict) else None}
+        failed = True
+        try:
+            if not method in self.methods:
+                response['error'] = {'code': -32601, 'message': f'Method not found. [{method}]'}
+            else:
+                params = request.get('params', {})
+                try:
+                    signature = inspect.signature(self.methods[method])
+                    arguments = signature.bind(*params) if isinstance(params, list) else signature.bind(**params)
+                except TypeError as e:
+                    response['error'] = {'code': -32602, 'message': f'Invalid params. ({e})'}
+                else:
+                    result = self.methods[method](*arguments.args, **arguments.kwargs)
+                    response['result'] = json.loads(json.dumps(result))
+                    failed = False
+        except Exception as e:
+            response['error'] = {'code': -32603, 'message': f'Internal error. ({e})'}
+            log(f'Failed to handle request: {e}')
+        # Unknown methods share a key to bound metrics.
+        self.metrics.record(method if method in self.methods else 'unknown', time.time() - begin, failed)
+        return response if isinstance(request, dict) and 'id' in request else None
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    ''' Newline delimited JSON-RPC over stream socket. '''
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': 'Parse error.'}}
+            else:
+                if isinstance(request, list):
+                    response = list(filter(None, [self.server.service.handle(_) for _ in request])) or None
+                else:
+                    response = self.server.service.handle(request)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def create_server(service, socket_path=None, host='127.0.0.1', port=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixServer(socket_path, RequestHandler)
+    else:
+        server = TCPServer((host, port or 0), RequestHandler)
+    server.service = service
+    return server
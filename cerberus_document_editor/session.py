@@ -0,0 +1,252 @@
+import copy
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+from .journal import apply_operation
+from .validator import Validator, ErrorIndex, flatten_errors
+from .parallel import ParallelList
+from .workspace import DocumentFile
+from .lazy import PENDING, pending_keys, drop_errors
+from .hashing import SubtreeHash
+
+# Document Session
+# -- Document with prepared schema (no UI)
+# -- Apply batch of path based operations (set, delete, insert, move, rename)
+# -- Normalize and validate once per batch
+# -- Dirty check and validation memo by subtree hash
+class DocumentSession:
+    memo_size = 8   # Validation results kept by document hash (e.g. undo to previous state)
+
+    def __init__(self, schema, document, prepared_schema=None, normalized=None, lazy=None, validated=None):
+        self.schema = schema
+        self.lazy = lazy            # LazyDocument of fast-open mode.
+        self.validator = Validator(prepared_schema or schema, purge_unknown=True)
+        self.prepared = self.validator.schema
+        self.parallel = ParallelList.for_schema(schema)
+        self.original = json.loads(json.dumps(document))
+        self.document = normalized if normalized is not None else self.normalized(document)
+        self.hashes = SubtreeHash(self.document)
+        self.original_hashes = SubtreeHash(self.original)
+        self.file = None
+        self.on_operation = None    # Called with each applied operation (e.g. journal).
+        self.__batch = None
+        self.__result = None        # (valid, errors) of current document.
+        self.__results = OrderedDict()  # Document hash -> (valid, errors)
+        self.error_index = ErrorIndex()
+        if normalized is not None and validated is not None:
+            # Validation result of the normalized document (e.g. cached).
+            self.__result = tuple(validated)
+            self.error_index.update(self.__result[1])
+
+    @classmethod
+    def open(cls, filename, schema, roundtrip=False, prepared_schema=None, lazy=False):
+        file = DocumentFile(filename, roundtrip, lazy).load()
+        if file.stream:
+            raise TypeError('Not support multi-document stream.')
+        session = cls(schema, file.document, prepared_schema, lazy=file.lazy)
+        session.file = file
+        return session
+
+    def save(self):
+        self.file.save(self.document)
+
+    @property
+    def is_modified(self):
+        return self.hashes.digest() != self.original_hashes.digest()
+
+    def digest(self, path=()):
+        ''' Hash of sub tree of document at path. '''
+        return self.hashes.digest(path)
+
+    def reload_schema(self, schema):
+        ''' Replace schema. Return True if changed. '''
+        if schema == self.schema:
+            return False
+        self.schema = schema
+        self.validator = Validator(schema, purge_unknown=True)
+        self.prepared = self.validator.schema
+        self.parallel = ParallelList.for_schema(schema)
+        self.__result = None
+        self.__results = OrderedDict()
+        return True
+
+    def __restore_schema(self):
+        # Validator keeps the schema of latest call (e.g. single field validation).
+        if self.validator.schema is not self.prepared:
+            self.validator.schema = self.prepared
+
+    def normalized(self, document):
+        self.__restore_schema()
+        document = json.loads(json.dumps(document))
+        pending = pending_keys(document)
+        if pending:
+            # Keep pending subtrees out of normalization (and its defaults).
+            result = self.validator.normalized({k: v for k, v in document.items() if not k in pending}, ordered=True) or document
+            merged = {k: PENDING if k in pending else result[k] for k in document if k in pending or k in result}
+            merged.update((k, v) for k, v in result.items() if not k in merged)
+            return merged
+        if self.parallel and self.parallel.accept(document):
+            return self.parallel.normalized(document)
+        return self.validator.normalized(document, ordered=True) or document
+
+    def normalized_field(self, key, value, schema):
+        ''' Normalize only an entry of mapping document with its field schema. '''
+        if value is None and (schema.get('selector') or schema.get('type') == 'dict'):
+            value = {}  # Selector needs a mapping to resolve kind and defaults.
+        document = json.loads(json.dumps({key: value}))
+        result = self.validator.normalized(document, json.loads(json.dumps({key: schema})), ordered=True) or document
+        return result.get(key)
+
+    def normalize(self):
+        self.document = self.normalized(self.document)
+        self.hashes = SubtreeHash(self.document)
+        self.__result = None
+
+    def validate(self):
+        ''' Validate once per change. '''
+        if self.__result is None and self.digest() in self.__results:
+            self.__result = self.__results[self.digest()]
+            self.__results.move_to_end(self.digest())
+            self.error_index.update(self.__result[1])
+        if self.__result is None:
+            if self.parallel and self.parallel.accept(self.document):
+                self.__result = self.parallel.validate(self.document)
+            elif pending_keys(self.document):
+                pending = pending_keys(self.document)
+                self.__restore_schema()
+                self.validator.validate({k: v for k, v in self.document.items() if not k in pending}, self.prepared, normalize=False)
+                errors = drop_errors(self.validator.errors, pending)
+                self.__result = (not errors, errors)
+            else:
+                self.__restore_schema()
+                valid = self.validator.validate(self.document, self.prepared, normalize=False)
+                self.__result = (valid, {} if valid else self.validator.errors)
+            self.error_index.update(self.__result[1])
+            self.__results[self.digest()] = self.__result
+            if len(self.__results) > self.memo_size:
+                self.__results.popitem(last=False)
+        return self.__result[0]
+
+    @property
+    def result(self):
+        ''' (valid, errors) of current document. '''
+        self.validate()
+        return self.__result
+
+    @property
+    def errors(self):
+        self.validate()
+        return self.__result[1]
+
+    def error_list(self):
+        return flatten_errors(self.errors)
+
+    def materialize(self, key):
+        ''' Parse pending subtree of fast-open document. '''
+        if self.lazy is None or self.document.get(key) != PENDING:
+            return self.document.get(key)
+        value = self.lazy.materialize(key)
+        self.original[key] = json.loads(json.dumps(value))
+        self.document[key] = json.loads(json.dumps(value))
+        self.original_hashes.update({'op': 'set', 'path': [key]})
+        self.hashes.update({'op': 'set', 'path': [key]})
+        self.__result = None
+        return self.document[key]
+
+    # Operations
+    def get(self, path, default=None):
+        value = self.document
+        if self.lazy is not None and len(path) > 1:
+            self.materialize(path[0])
+        try:
+            for key in path:
+                value = value[int(key)] if isinstance(value, list) else value[key]
+        except (KeyError, IndexError, ValueError, TypeError):
+            return default
+        return value
+
+    def apply(self, operations, normalize=True, notify=True):
+        ''' Apply operations at once (all or nothing) and normalize once. '''
+        operations = [dict(op, path=list(op['path'])) for op in operations]
+        for op in operations:
+            if 'new' in op:
+                op['new'] = json.loads(json.dumps(op['new']))
+            if self.lazy is not None and len(op['path']) > 1:
+                self.materialize(op['path'][0])
+        # Copy containers along the paths only, so a failed batch leaves document as it was.
+        document, copied = self.document, set()
+        for op in operations:
+            if not op['path']:
+                if op['op'] != 'set':
+                    raise ValueError(f"Cannot {op['op']} root document.")
+                document = op['new']
+                continue
+            document = self.__detach(document, op['path'], copied)
+            try:
+                apply_operation(document, op)
+            except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+                raise ValueError(f"Cannot {op['op']} {'.'.join(map(str, op['path']))}. ({e})") from e
+        self.document = document
+        for op in operations:
+            self.hashes.update(op, self.document)
+            if notify and self.on_operation:
+                self.on_operation(op)
+        self.__result = None
+        if normalize:
+            self.normalize()
+        return self
+
+    @staticmethod
+    def __detach(document, path, copied):
+        ''' Shallow copy root and containers on the path (once per batch). Return root. '''
+        def detach(value):
+            if not id(value) in copied:
+                value = copy.copy(value)
+                copied.add(id(value))
+            return value
+        document = parent = detach(document)
+        for key in path[:-1]:
+            if isinstance(parent, list):
+                key = int(key) if str(key).lstrip('-').isdigit() else None
+                child = parent[key] if key is not None and -len(parent) <= key < len(parent) else None
+            else:
+                child = parent.get(key) if isinstance(parent, dict) else None
+            if not isinstance(child, (dict, list)):
+                break   # Created or rejected by apply_operation.
+            parent[key] = parent = detach(child)
+        return document
+
+    def __operation(self, op, normalize):
+        if self.__batch is not None:
+            self.__batch.append(op)
+            return self
+        return self.apply([op], normalize)
+
+    @contextmanager
+    def batch(self, normalize=True):
+        ''' Collect operations and apply them at once on exit. '''
+        if self.__batch is not None:
+            yield self
+            return
+        self.__batch = []
+        try:
+            yield self
+            operations = self.__batch
+        finally:
+            self.__batch = None
+        self.apply(operations, normalize)
+
+    def set(self, path, value, normalize=True):
+        return self.__operation({'op': 'set', 'path': path, 'new': value}, normalize)
+
+    def delete(self, path, normalize=True):
+        return self.__operation({'op': 'delete', 'path': path}, normalize)
+
+    def insert(self, path, value, normalize=True):
+        return self.__operation({'op': 'insert', 'path': path, 'new': value}, normalize)
+
+    def move(self, path, to, normalize=True):
+        return self.__operation({'op': 'move', 'path': path, 'to': to}, normalize)
+
+    def rename(self, path, new_key, normalize=True):
+        return self.__operation({'op': 'rename', 'path': path, 'new': new_key}, normalize)
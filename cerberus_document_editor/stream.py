@@ -0,0 +1,87 @@
+import re
+import json
+from . import yaml_parser
+from .roundtrip import SourceMap
+
+# Document Stream
+# -- Index '---' separated documents by offset (no parsing)
+# -- Parse a document only when it is requested
+# -- Rewrite only changed documents on dump
+class DocumentStream:
+    separator = re.compile(r'^---(?=[ \t\r\n]|$)', re.M)
+    content = re.compile(r'^[ \t]*[^\s#]', re.M)
+    preview = re.compile(r'^(?:kind|name):[ \t]*([^\s#]+)', re.M)
+
+    def __init__(self, text, roundtrip=False):
+        self.text = text
+        self.roundtrip = roundtrip
+        self.offsets = []
+        self._documents = {}
+        self._changes = {}
+        bounds = [0] + [_.start() for _ in self.separator.finditer(text)] + [len(text)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if self.separator.match(text, start):
+                body = text.find('\n', start, end)
+                body = end if body < 0 else body + 1
+                inline = text[start+3:body].split('#')[0].strip()
+            else:
+                body, inline = start, ''
+            if inline or self.content.search(text, body, end):
+                self.offsets.append((start, end))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def source(self, index):
+        start, end = self.offsets[index]
+        return self.text[start:end]
+
+    def title(self, index):
+        ''' Cheap summary of document without parsing. '''
+        start, end = self.offsets[index]
+        values = [_.group(1) for _ in self.preview.finditer(self.text, start, min(end, start + 4096))]
+        return '/'.join(values[:2]) or f'Document {index}'
+
+    def document(self, index):
+        if index in self._changes:
+            return json.loads(json.dumps(self._changes[index]))
+        if index not in self._documents:
+            self._documents[index] = yaml_parser.load_with_variables(self.source(index))[0] or {}
+        return json.loads(json.dumps(self._documents[index]))
+
+    def update(self, index, document):
+        original = self._documents.get(index)
+        if original is None:
+            original = self.document(index)
+        if document == original:
+            self._changes.pop(index, None)
+        else:
+            self._changes[index] = document
+
+    @property
+    def is_modified(self):
+        return len(self._changes) > 0
+
+    def changes(self):
+        return dict(self._changes)
+
+    def dump_document(self, index):
+        source = self.source(index)
+        document = self._changes[index]
+        if self.roundtrip:
+            patched = SourceMap(source).patch(self._documents[index], document)
+            if patched is not None:
+                return patched
+        header = '---\n' if self.separator.match(source) else ''
+        return header + yaml_parser.dump(document)
+
+    def dump(self):
+        pieces = []
+        position = 0
+        for index in sorted(self._changes):
+            start, end = self.offsets[index]
+            pieces.append(self.text[position:start])
+            pieces.append(self.dump_document(index))
+            position = end
+        pieces.append(self.text[position:])
+        return ''.join(pieces)
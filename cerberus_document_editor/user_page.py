@@ -1,18 +1,21 @@
-import urwid
+import os
 import json
+import itertools
 import copy
-import re
 from collections import OrderedDict
-from distutils.util import strtobool
 from cerberus_kind.utils import parse_error, kind_schema
 from cerberus_document_editor import yaml_parser
-from .validator import Validator
-from .widget import Widget, ComboBox
+from .validator import child_errors
+from .binding import FieldBinding, parse_bool
+from .session import DocumentSession
+from .lazy import PENDING
+from .bulk import BulkImport, detect_format, read_rows, write_rows, error_writer
+from .widget import Widget
 from .page import ListPage, PopupPage
 from .debug import log
 
 def BOOLEAN(x):
-    return bool(strtobool(x))
+    return parse_bool(x)
 
 # Helper functions
 def ellipsis(text, max_w=60, max_h=0):
@@ -30,15 +33,48 @@ def ellipsis(text, max_w=60, max_h=0):
     else:
         return '\n'.join(cols(rows))
 
+previews = OrderedDict()    # Hash of sub tree -> preview text
+PREVIEW_CACHE_SIZE = 1024
+
+def preview_text(digest, value):
+    ''' Preview of sub tree memoized by its hash. '''
+    if digest in previews:
+        previews.move_to_end(digest)
+    else:
+        previews[digest] = ellipsis(yaml_parser.dump(value))
+        if len(previews) > PREVIEW_CACHE_SIZE:
+            previews.popitem(last=False)
+    return previews[digest]
+
 def callback_generator(ctx, name, schema, doc):
     def callback(key):
-        page = EditorPage(
-            name, 
-            schema, # copy.deepcopy(schema),
-            doc,
-            #doc if isinstance(doc, list) else dict(filter(lambda x: x[0] != 'kind', doc.items())),
-            True,
-        )
+        cache = getattr(ctx.hwnd, 'page_cache', None)
+        # Schema node of child is named by key in schema of parent page.
+        cache_key = (ctx.path + (name,), id(ctx.session.schema))
+        page = cache.get(cache_key, ctx.version(name)) if cache is not None else None
+        if page is None:
+            value, normalized, validated = doc, None, None
+            if value == PENDING:
+                # Parse the subtree of fast-open document on first drill.
+                value = ctx.session.materialize(name)
+                ctx.json = {'document': ctx.session.document}
+                ctx.journal({'op': 'set', 'path': [name], 'new': value})
+            else:
+                # Sub tree of parent is normalized and validated already.
+                errors = child_errors(ctx.session.errors, name, schema)
+                normalized, validated = value, (not errors, errors)
+            page = EditorPage(
+                name, 
+                schema, # copy.deepcopy(schema),
+                value,
+                #doc if isinstance(doc, list) else dict(filter(lambda x: x[0] != 'kind', doc.items())),
+                True,
+                normalized=normalized,
+                validated=validated,
+            )
+            if cache is not None:
+                page.cache_key = cache_key
+                cache.put(cache_key, ctx.version(name), page)
         ctx.next(page)
     return callback
 
@@ -52,20 +88,33 @@ def get_selector_info(document, schema):
     return kind, allowed
 
 class EditorPage(ListPage):
-    def __init__(self, name, schema, document, sub_page=False):
+    serials = itertools.count()
+
+    def __init__(self, name, schema, document, sub_page=False, prepared_schema=None, normalized=None, lazy=None, validated=None):
         super().__init__(name, sub_page=sub_page)
-        self.widget_map = {}
+        self.bindings = {}  # Editable widget -> FieldBinding
+        self._field_validators = {}
         log(f'Schema: {schema}')
         log(f'Document: ', document)
 
-        self.validator = Validator(schema, purge_unknown=True)
+        # prepared_schema: Already validated schema(DefinitionSchema) to skip preparing.
+        # normalized: Already normalized document (e.g. prefetched).
+        # lazy: LazyDocument of fast-open mode (document has pending subtrees).
+        # validated: Validation result of normalized document (e.g. cached).
+        self.session = DocumentSession(schema, document, prepared_schema, normalized, lazy, validated)
+        self.session.on_operation = self.journal
+        self.validator = self.session.validator
         self.json = {
-            'document': self.validator.normalized(document, ordered=True) or document,
+            'document': self.session.document,
             'schema': schema
         }
-        if document != self.json['document']:
+        if self.session.is_modified:
             self.modified()
         self._config = {}
+        self._serial = next(self.serials)
+        self._generation = 0    # Changed when all children may be changed.
+        self._versions = {}     # Key -> version of sub tree
+        self.cache_key = None
 
     def __repr__(self):
         return json.dumps(self.json.get('document', {}))
@@ -90,6 +139,32 @@ class EditorPage(ListPage):
     def is_oneof(self):
         return self._config.get('root_type') == 'oneof'
 
+    @property
+    def path(self):
+        ''' Document path of this page from the root document. '''
+        stack = [_ for _ in getattr(self.hwnd, 'stack', []) if not _.is_modal]
+        return tuple(_.name for _ in stack[1:stack.index(self)+1]) if self in stack else ()
+
+    def journal(self, op):
+        journal = getattr(self.hwnd, 'journal', None)
+        if journal:
+            journal.record(op['op'], self.path + tuple(op['path']), **{k: v for k, v in op.items() if not k in ['op', 'path']})
+
+    def version(self, key):
+        ''' Version of sub tree (changed when the sub tree is changed). '''
+        return (self._serial, self._generation, self._versions.get(key, 0))
+
+    def apply(self, operations, normalize=False, journal=True):
+        ''' Apply operations to document via session. '''
+        self.session.apply(operations, normalize, notify=journal)
+        self.json = {'document': self.session.document}
+        for op in operations:
+            if normalize or not op['path'] or (op['op'] in ['insert', 'move', 'delete'] and self.is_list):
+                self._generation += 1   # Keys (index) of children are shifted.
+            else:
+                for key in [op['path'][0]] + ([op['new']] if op['op'] == 'rename' else []):
+                    self._versions[key] = self._versions.get(key, 0) + 1
+
     def warning(self, message=None, high_priority=False):
         super(ListPage, self).warning(message, high_priority)
 
@@ -101,28 +176,43 @@ class EditorPage(ListPage):
             if 'popup' in page.json:
                 key = page.json.get('popup')
                 if key:
-                    body = self.json
-                    if key in body['document']:
+                    if key in self.session.document:
                         self.warning('Already exist key.')
                     else:
-                        body['document'][key] = None
-                        body['document'] = self.validator.normalized(body['document'], ordered=True)
-                        self.json = body
+                        # Normalize and place only the new entry.
+                        schema = self.field_schemas([key])
+                        order = lambda k: schema.get(k, {}).get('order', float('inf'))
+                        before = None
+                        if not self.is_valuesrules:
+                            before = next((k for k in self.session.document if order(k) > order(key)), None)
+                        value = self.session.normalized_field(key, None, schema.get(key, {}))
+                        self.apply([{'op': 'insert', 'path': [key], 'new': value, 'before': before}])
                         self.modified()
+            elif 'bulk_set' in page.json:
+                self.set_selected(page.json.get('bulk_set'))
+            elif page.json.get('import'):
+                self.import_rows(page.json.get('import'))
+            elif page.json.get('export'):
+                self.export_rows(page.json.get('export'))
             elif 'rename' in page.json:
                 if hasattr(self, '_last_key'):
                     last_key = getattr(self, '_last_key')
                     new_key = page.json.get('rename')
                     if new_key:
-                        body = self.json
-                        if new_key in body['document']:
+                        if new_key in self.session.document:
                             self.warning("Already exist key.")
                         else:
-                            body['document'] = OrderedDict(
-                                [(new_key, v) if k == last_key else (k, v) for k, v in body['document'].items()]
-                            )
-                            self.json = body
+                            self.apply([{'op': 'rename', 'path': [last_key], 'new': new_key}])
                             self.modified()
+            elif 'duplicate' in page.json:
+                new_key = page.json.get('duplicate')
+                if new_key and hasattr(self, '_duplicate_key'):
+                    if new_key in self.session.document:
+                        self.warning("Already exist key.")
+                    else:
+                        self.apply([{'op': 'insert', 'path': [new_key], 'new': self.session.get([self._duplicate_key])}])
+                        self.marked = set()
+                        self.modified()
             elif 'exit' in page.json:
                 key = page.json.get('exit')
                 if key.lower() == 'yes':
@@ -132,99 +222,54 @@ class EditorPage(ListPage):
                 elif key.lower() == 'cancel':
                     ...
             else:
-                data = self.json
-                document = data['document']
-                if isinstance(page.json['document'], list):
-                    document[page.name] = list(filter(None, page.json['document']))
-                elif isinstance(page.json['document'], dict):
-                    document[page.name] = dict(filter(lambda x: x[1] is not None, page.json['document'].items()))
-                else:
-                    document[page.name] = page.json['document']
-                if self.json != data:
-                    self.json = data
+                value = page.session.document
+                if isinstance(value, list):
+                    value = list(filter(None, value))
+                elif isinstance(value, dict):
+                    value = dict(filter(lambda x: x[1] is not None, value.items()))
+                filtered = len(value) != len(page.session.document)
+                if filtered or not page.name in self.session.document or page.session.digest() != self.session.digest([page.name]):
+                    # Already journaled by sub page.
+                    self.apply([{'op': 'set', 'path': [page.name], 'new': value}], journal=False)
                     self.modified()
+                    cache = getattr(self.hwnd, 'page_cache', None)
+                    if cache is not None and getattr(page, 'cache_key', None) and not filtered:
+                        # Sub page is up to date with new version.
+                        cache.put(page.cache_key, self.version(page.name), page)
 
     def on_change(self, widget, new_value):
-        def casting(value):
-            if isinstance(widget, urwid.IntEdit):
-                return int(f"0{value}")
-            if isinstance(widget, urwid.numedit.FloatEdit):
-                return float(f"0{value}")
-            return value
-        new_value = casting(new_value)
-
-        key = self.widget_map.get(hash(widget))
-        pattern = re.compile(r'^__(.*)__$')
-        matched = pattern.match(str(key))
-        if matched:
-            key = matched.group(1)
-            if key in ['kind']:
-                data = self.json
-                document = data['document']
-                document[key] = new_value
-                document = self.validator.normalized(document, data['schema'], ordered=True)
-                if self.json['document'] != document:
-                    self.json = {'document': document}
-                    self.modified()
-                self.render()
-        else:
-            type_pattern = re.compile(r'^T__([A-Z]+)_(.*)__$')
-            matched = type_pattern.match(str(key))
-            if matched:
-                cast_type = matched.group(1)
-                try:
-                    cast_func = eval(f"lambda x: {cast_type}(x)")
-                    new_value = cast_func(new_value)
-                except:
-                    ...
-                key = matched.group(2)
-
-            data = self.json
-            document = data['document']
-            schema = data['schema']
-
-            document[key] = new_value
-            if self.json['document'] != document:
-                self.json = {"document": document}
+        binding = self.bindings.get(widget)
+        if binding is None:
+            return
+        new_value = binding.cast(new_value)
+        key = binding.key
+        if binding.role == 'kind':
+            if self.session.get([key]) != new_value:
+                self.apply([{'op': 'set', 'path': [key], 'old': self.session.get([key]), 'new': new_value}], normalize=True)
                 self.modified()
-            
-            REFRESH_WIDGETS = [ComboBox]
-            if type(widget) in REFRESH_WIDGETS:
-                self.render()
+            self.render()
+            return
 
-            # Update indicator for focusing item.
-            if '__root__' in schema:
-                schema = schema['__root__']
-                if schema.get('selector'):
-                    # allowed = [_.title() for _ in schema['selector']]
-                    # kind = document.get('kind', '').lower()
-                    # if not kind in schema['selector']:
-                    #     allowed += [kind.title()]
-                    #     kind = allowed[0].lower()
-                    # schema = schema['selector'].get(kind)
-                    kind, _ = get_selector_info(document, schema)
-                    schema = schema['selector'].get(kind)
-                elif schema.get('valuesrules'):
-                    schema = {key: schema['valuesrules'] for key in document}
-                elif schema.get('oneof'):
-                    schema = {k: v for _ in schema.get('oneof') for k, v in _.get('schema', {}).items()}
-                else:
-                    schema = schema['schema']
-            
-            item_schema = schema.get(key)
-            if item_schema:
-                if not self.validator.validate({key: new_value}, {key: item_schema}, update=True, normalize=False):
-                    self.warning(parse_error(self.validator.errors, with_path=False), True)
-                else:
-                    self.warning()
+        document = self.session.document
+        old_value = self.session.get([key])
+        if old_value != new_value or not self.is_list and not key in document:
+            self.apply([{'op': 'set', 'path': [key], 'old': old_value, 'new': new_value}])
+            self.modified()
 
-    def on_update(self):
-        doc = self.json['document']
-        schema = self.json['schema']
+        if binding.refresh:
+            self.render()
 
-        log('----------------------------------------------')
+        # Update indicator for focusing item.
+        if binding.schema:
+            errors = binding.validate(new_value)
+            self.session.error_index.update(errors, prefix=(key,))
+            if errors:
+                self.warning(parse_error(errors, with_path=False), True)
+            else:
+                self.warning()
 
-        # Prepare Root schema
+    def resolve_schema(self, schema, doc):
+        ''' Prepare root schema and return field schema of this page. '''
         if '__root__' in schema:
             schema = schema.get('__root__')
             self._config['root_schema'] = schema
@@ -258,6 +303,35 @@ class EditorPage(ListPage):
 
             log('root schema:', list(self._config['root_schema'].keys()))
             log('root type:', self._config['root_type'])
+        return schema
+
+    def field_schemas(self, keys):
+        ''' Schema of fields in this page (without resolving every key of valuesrules). '''
+        if self.is_valuesrules:
+            return {key: self.root_schema['valuesrules'] for key in keys}
+        return self.resolve_schema(self.json['schema'], self.session.document)
+
+    def child_schema(self, key):
+        schema = self.resolve_schema(self.json['schema'], self.json['document'])
+        sub_schema = schema if self.is_list else schema.get(key, {})
+        dtype = sub_schema.get('type', 'string')
+        dtype = dtype[0] if isinstance(dtype, list) else dtype
+        if dtype in ['dict'] and 'schema' in sub_schema:
+            return sub_schema['schema']
+        return {'__root__': sub_schema}
+
+    def on_schema_changed(self, schema):
+        if self.session.reload_schema(schema):
+            self.validator = self.session.validator
+            self.json = {'schema': schema}
+
+    def on_update(self):
+        doc = self.json['document']
+        schema = self.json['schema']
+
+        log('----------------------------------------------')
+
+        schema = self.resolve_schema(schema, doc)
 
         # Prepare appendable items with hotkey
         if self.is_valuesrules:
@@ -266,96 +340,86 @@ class EditorPage(ListPage):
                 schema = {
                     'value': self.root_schema.get('keysrules', {'type': 'string'})
                 }
-                self.next(PopupPage("Add new item", background=self.on_draw(), schema=schema))
+                self.next(PopupPage("Add new item", schema=schema))
             self.register_keymap('ctrl n', 'Add new item', add_new_item)
             def rename_item(self):
                 schema = {
                     'value': self.root_schema.get('keysrules', {'type': 'string'})
                 }
-                self._last_key = self.widget_map[hash(Widget.unwrap_widget(self.get_focus_widget()))]
-                self.next(PopupPage("Rename item", background=self.on_draw(), schema=schema, return_key='rename'))
+                self._last_key = self.bindings[Widget.unwrap_widget(self.get_focus_widget())].key
+                self.next(PopupPage("Rename item", schema=schema, return_key='rename'))
             self.register_keymap('ctrl r', 'Rename item', rename_item)
         elif self.is_list:
             # 배열일 때
             def add_new_item(self):
-                doc = self.json.get('document', [])
+                doc = self.session.document
                 sub_type = schema.get('type', 'string')
                 if sub_type in ['string']:
-                    doc.append("")
+                    value = ""
                 elif sub_type in ['integer']:
-                    doc.append(0)
+                    value = 0
                 elif sub_type in ['float', 'number']:
-                    doc.append(.0)
+                    value = .0
                 elif sub_type in ['list']:
-                    doc.append(self.validator.normalized([], {'__root__': schema}, ordered=True))
+                    value = self.validator.normalized([], {'__root__': schema}, ordered=True)
                 elif sub_type in ['dict']:
-                    doc.append(self.validator.normalized({}, {'__root__': schema}, ordered=True))
-                self.json = {'document': doc}
+                    value = self.validator.normalized({}, {'__root__': schema}, ordered=True)
+                else:
+                    return
+                self.apply([{'op': 'insert', 'path': [len(doc)], 'new': value}])
                 self.render()
             self.register_keymap('ctrl n', 'Add new item', add_new_item)
-            def move_to_up(self):
-                doc = self.json.get('document', [])
-                widget = self.get_focus_widget()
-                int_key = int(self.widget_map[hash(Widget.unwrap_widget(widget))])
-                doc.insert(max(0, int_key-1), doc.pop(int_key))
-                self.json = {'document': doc}
-                self.prev_focus()
-                self.render()
-            self.register_keymap('ctrl up', 'Move to up', move_to_up)
-            def move_to_down(self):
-                doc = self.json.get('document', [])
-                widget = self.get_focus_widget()
-                int_key = int(self.widget_map[hash(Widget.unwrap_widget(widget))])
-                doc.insert(min(len(doc)-1, int_key+1), doc.pop(int_key))
-                self.json = {'document': doc}
-                self.next_focus()
-                self.render()
-            self.register_keymap('ctrl down', 'Move to down', move_to_down)
+            self.register_keymap('ctrl up', 'Move to up', lambda page: page.move_selected(-1))
+            self.register_keymap('ctrl down', 'Move to down', lambda page: page.move_selected(1))
+            self.register_keymap('ctrl o', 'Import rows', lambda page: page.next(PopupPage("Import rows from (JSONL/CSV)", return_key='import')))
+            self.register_keymap('ctrl w', 'Export rows', lambda page: page.next(PopupPage("Export rows to (JSONL/CSV)", return_key='export')))
         else:
             # 일반 스키마일 때
             appendable_items = {k: v.get('description') for k, v in schema.items() if not k in doc}
             if appendable_items:
                 def add_new_item(self):
-                    self.next(PopupPage("Add new item", background=self.on_draw(), ptype='select', items=appendable_items))
+                    self.next(PopupPage("Add new item", ptype='select', items=appendable_items))
                 self.register_keymap('ctrl n', 'Add new item', add_new_item)
             else:
                 self.unregister_keymap('ctrl n')
 
         # Prepare deletable items with hotkey
         if len(doc):
-            if self.is_list:
-                def delete_callback(self):
-                    widget = self.get_focus_widget()
-                    key = self.widget_map[hash(Widget.unwrap_widget(widget))]
-                    doc.pop(int(key))
-                    self.json = {'document': doc}
+            immutable_items = [] if self.is_list else [k for k, v in schema.items() if v.get('required', False)]
+            def delete_callback(self):
+                keys = self.selected_keys()
+                removable = [_ for _ in keys if not _ in immutable_items]
+                if removable:
+                    # Delete from the last, so list indexes are kept.
+                    self.apply([{'op': 'delete', 'path': [_], 'old': self.session.get([_])} for _ in reversed(removable)])
+                    self.marked = set()
+                    self.modified()
                     self.render()
-            else:
-                immutable_items = [k for k, v in schema.items() if v.get('required', False)]
-                def delete_callback(self):
-                    widget = self.get_focus_widget()
-                    key = self.widget_map[hash(Widget.unwrap_widget(widget))]
-                    for _ in [re.compile(r'^__(?P<key>.*)__$'), re.compile(r'^T__([A-Z]+)_(?P<key>.*)__$')]:
-                        matched = _.match(str(key))
-                        if matched:
-                            key = matched.group('key')
-                            break
-                    if not key in immutable_items:
-                        del doc[key]
-                        self.json = {'document': doc}
-                        self.modified()
-                        self.render()
-                    else:
-                        self.warning("Cannot remove required item(required).")
+                if len(removable) < len(keys):
+                    self.warning("Cannot remove required item(required).", True)
             self.register_keymap('ctrl d', 'Delete item', delete_callback)
         else:
             self.register_keymap('ctrl d', 'Delete item', lambda x: None, enabled=False)
 
+        # Prepare bulk operations for marked items
+        self.enable_selection()
+        if self.is_list or self.is_valuesrules:
+            self.register_keymap('ctrl p', 'Duplicate', lambda page: page.duplicate_selected())
+        self.register_keymap('ctrl b', 'Set value', lambda page: page.next(PopupPage("Set value of items", return_key='bulk_set')))
+
+        self.register_keymap('ctrl e', 'Next error', lambda page: page.next_error())
+
         # Re-construct widgets
         log('current schema:', list(schema.keys()))
+        self.session.validate()
         self.clear_items()
+        self.bindings = {}
+        self._field_validators = {}
+        bind = lambda widget, key, role='value', caster=None, refresh=False: self.bindings.__setitem__(
+            widget, FieldBinding(key, role, caster, sub_schema if role == 'value' else None, self._field_validators, refresh))
         for key, value in (enumerate(doc) if self.is_list else OrderedDict(doc).items()):
             log('key is', key)
+            position = len(self.listbox_contents)
             try:
                 if self.is_list:
                     sub_schema = schema
@@ -371,42 +435,53 @@ class EditorPage(ListPage):
                 log('  data type:', dtype)
                 log('  description:', desc)
 
-                if key == 'kind' and schema.get('kind'):
+                if value == PENDING:
+                    # Not materialized subtree (fast-open).
+                    widget = self.add_column_object(key, desc, text=ellipsis(self.session.lazy.preview(key)),
+                        callback=callback_generator(
+                            self,
+                            key,
+                            sub_schema['schema'] if dtype in ['dict'] and 'schema' in sub_schema else {'__root__': sub_schema},
+                            value
+                        )
+                    )
+                    bind(widget, key, 'object')
+                elif key == 'kind' and schema.get('kind'):
                     log(  'allowed:', schema['kind']['allowed'], '/', doc['kind'])
                     widget = self.add_column_dropdown(key, desc, 
                         schema['kind']['allowed'],
                         doc['kind']
                     )
-                    self.widget_map[hash(widget)] = f'__{key}__'
+                    bind(widget, key, 'kind', refresh=True)
                 elif sub_schema.get('allowed'):
                     allowed_list = sub_schema.get('allowed')
                     widget = self.add_column_dropdown(key, desc, 
                         allowed_list + ([doc[key]] if not doc[key] in allowed_list else []),
                         doc[key]# if doc[key] in allowed_list else len(allowed_list)-1
                     )
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key, refresh=True)
                 elif dtype in ['float', 'number']:       # float
                     value = value or .0
                     widget = self.add_column_number(key, desc, value)
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key, caster=lambda x: float(f"0{x}"))
                 elif dtype in ['integer']:             # integer
                     value = value or 0
                     widget = self.add_column_integer(key, desc, value)
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key, caster=lambda x: int(f"0{x}"))
                 elif dtype in ['string']:
                     value = value or ""
                     widget = self.add_column_str(key, desc, value, sub_schema.get('multiline', False))
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key)
                 elif dtype in ['boolean']:
                     allowed_list = [True, False]
                     widget = self.add_column_dropdown(key, desc, 
                         allowed_list,
                         doc[key] if doc[key] in allowed_list else allowed_list[0]
                     )
-                    self.widget_map[hash(widget)] = f'T__BOOLEAN_{key}__'
+                    bind(widget, key, caster=BOOLEAN, refresh=True)
                 elif dtype in ['list']:
                     value = value or []
-                    widget = self.add_column_object(key, desc, text=ellipsis(yaml_parser.dump(value)),
+                    widget = self.add_column_object(key, desc, text=preview_text(self.session.digest([key]), value),
                         callback=callback_generator(
                             self, 
                             key,
@@ -414,11 +489,11 @@ class EditorPage(ListPage):
                             value
                         )
                     )
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key, 'object')
                 elif dtype in ['dict']:                 # Object
                     value = value or {}
                     if 'schema' in sub_schema:
-                        widget = self.add_column_object(key, desc, text=ellipsis(yaml_parser.dump(value)), 
+                        widget = self.add_column_object(key, desc, text=preview_text(self.session.digest([key]), value), 
                             callback=callback_generator(
                                 self, 
                                 key,
@@ -427,7 +502,7 @@ class EditorPage(ListPage):
                             )
                         )
                     else:
-                        widget = self.add_column_object(key, desc, text=ellipsis(yaml_parser.dump(value)),
+                        widget = self.add_column_object(key, desc, text=preview_text(self.session.digest([key]), value),
                             callback=callback_generator(
                                 self, 
                                 key,
@@ -435,20 +510,261 @@ class EditorPage(ListPage):
                                 value
                             )
                         )
-                    self.widget_map[hash(widget)] = key
+                    bind(widget, key, 'object')
             except Exception as e:
                 raise e
+            if len(self.listbox_contents) > position:
+                self.row_keys[len(self.listbox_contents)-1] = key
+                if key in self.marked or (key,) in self.session.error_index:
+                    self.update_mark(len(self.listbox_contents)-1)
 
         self.update_indicator()
     
+    def index_text(self, position):
+        key = self.row_keys.get(position)
+        value = self.session.get([key])
+        return str(key) if isinstance(value, (dict, list)) else f'{key} {value}'
+
+    def item_colorscheme(self, key):
+        if key in self.marked:
+            return 'marked_label'
+        return 'error_label' if (key,) in self.session.error_index else 'label'
+
+    def move_selected(self, step):
+        ''' Move selected items of list by step (-1: up, 1: down) at once. '''
+        keys = self.selected_keys()
+        doc = self.session.document
+        if not keys or (step < 0 and keys[0] == 0) or (step > 0 and keys[-1] == len(doc)-1):
+            return
+        operations = [{'op': 'move', 'path': [_], 'to': _+step} for _ in (keys if step < 0 else reversed(keys))]
+        focus_key = self.row_keys.get(self.get_focus())
+        self.apply(operations)
+        self.marked = set(_+step for _ in self.marked)
+        self.modified()
+        self.render()
+        if focus_key is not None:
+            # Focus follows moved item.
+            self.set_focus(next((p for p, k in self.row_keys.items() if k == focus_key+step), self.get_focus()))
+
+    def duplicate_selected(self):
+        ''' Duplicate selected items (next to the item for list, new key for map). '''
+        keys = self.selected_keys()
+        if self.is_list:
+            operations = [{'op': 'insert', 'path': [_+1], 'new': self.session.get([_])} for _ in reversed(keys)]
+        else:
+            operations, names, unnamed = [], set(self.session.document), []
+            for key in keys:
+                name = self.copy_name(key, names)
+                if name is None:
+                    unnamed.append(key)
+                    continue
+                names.add(name)
+                operations.append({'op': 'insert', 'path': [name], 'new': self.session.get([key])})
+            if unnamed:
+                # No valid name can be derived from the key, ask it.
+                self._duplicate_key = unnamed[0]
+                self.next(PopupPage(f"Name of copy of {unnamed[0]}", schema={'value': self.keys_schema}, return_key='duplicate'))
+        if operations:
+            self.apply(operations)
+            self.marked = set()
+            self.modified()
+            self.render()
+
+    @property
+    def keys_schema(self):
+        return self.root_schema.get('keysrules', {'type': 'string'}) if self.is_valuesrules else {'type': 'string'}
+
+    def copy_name(self, key, names):
+        ''' Unused key for copy of key which satisfies keysrules, None if not found. '''
+        binding = FieldBinding(key, schema=self.keys_schema, validators=self._field_validators)
+        for sep in ['-', '_', '']:
+            name, count = f'{key}{sep}copy', 1
+            while name in names:
+                count += 1
+                name = f'{key}{sep}copy{sep}{count}'
+            if not binding.validate(name):
+                return name
+        return None
+
+    def set_selected(self, text):
+        ''' Set value of selected items (casted for each field). '''
+        bindings = {_.key: _ for _ in self.bindings.values() if _.role == 'value'}
+        keys = [_ for _ in self.selected_keys() if _ in bindings]
+        if not keys:
+            self.warning('No editable item is selected.', True)
+            return
+        self.apply([{'op': 'set', 'path': [_], 'old': self.session.get([_]), 'new': bindings[_].cast(text)} for _ in keys])
+        self.marked = set()
+        self.modified()
+        self.render()
+
     def update_indicator(self):
-        doc = self.json.get('document')
-        schema = self.json.get('schema')
-        if not self.validator.validate(doc, schema, update=False, normalize=False):
-            self.warning(parse_error(self.validator.errors, with_path=True))
+        if not self.session.validate():
+            # Errors of focused row first.
+            key = self.row_keys.get(self.get_focus())
+            index = self.session.error_index
+            self.warning((key is not None and index.message((key,))) or index.message())
         else:
             self.warning()
 
+    def import_rows(self, filename):
+        ''' Append valid rows of file to this list, errors of rows are written to FILENAME.errors.jsonl. '''
+        try:
+            format = detect_format(filename)
+            bulk = BulkImport(self.validator, self.root_schema.get('schema', {}))
+            with open(filename, newline='') as f, open(f'{filename}.errors.jsonl', 'w') as errors:
+                for operations in bulk.operations(read_rows(f, format, bulk.item_rule), [], len(self.session.document), error_writer(errors)):
+                    self.apply(operations)
+        except (OSError, TypeError) as e:
+            self.warning(str(e), True)
+            return
+        if not bulk.rejected:
+            os.remove(f'{filename}.errors.jsonl')
+        if bulk.accepted:
+            self.modified()
+        self.warning(f'{bulk.accepted} rows imported, {bulk.rejected} rows rejected.' + (f' ({filename}.errors.jsonl)' if bulk.rejected else ''), True)
+
+    def export_rows(self, filename):
+        try:
+            format = detect_format(filename)
+            with open(filename, 'w', newline='') as f:
+                count = write_rows(f, format, self.root_schema.get('schema', {}), self.session.document)
+        except (OSError, TypeError) as e:
+            self.warning(str(e), True)
+            return
+        self.warning(f'{count} rows exported.', True)
+
+    def next_error(self):
+        ''' Move focus to next row which has errors (at or under it). '''
+        self.session.validate()
+        rows = [_ for _ in sorted(self.row_keys) if (self.row_keys[_],) in self.session.error_index]
+        if not rows:
+            self.warning('No error in this page.' if self.session.error_index else 'No error.', True)
+            return
+        focus = self.get_focus()
+        self.set_focus(next((_ for _ in rows if _ > focus), rows[0]))
+        self.update_indicator()
+
+    def on_close(self):
+        self.next(PopupPage("Exit with Save", return_key='exit', ptype='select', items=['Yes', 'No', 'Cancel']))
+        return True
+
+class DocumentPickerPage(ListPage):
+    def __init__(self, name, schema, stream, sub_page=False, prepared_schema=None):
+        super().__init__(name, sub_page=sub_page)
+        self.schema = schema
+        self.prepared_schema = prepared_schema
+        self.stream = stream
+
+    def __repr__(self):
+        return json.dumps({str(k): v for k, v in self.stream.changes().items()})
+
+    def on_schema_changed(self, schema):
+        if schema != self.schema:
+            self.schema = schema
+            self.prepared_schema = None
+
+    def child_schema(self, name):
+        return self.schema
+
+    def open_document(self, index):
+        def callback(key):
+            self.next(EditorPage(index, self.schema, self.stream.document(index), True, self.prepared_schema))
+        return callback
+
+    def on_page_result(self, page):
+        if page.json:
+            if 'exit' in page.json:
+                key = page.json.get('exit')
+                if key.lower() == 'yes':
+                    self.hwnd.destroy()
+                elif key.lower() == 'no':
+                    self.hwnd.destroy(False)
+            elif 'document' in page.json:
+                self.stream.update(page.name, json.loads(str(page)))
+                if self.stream.is_modified:
+                    self.modified()
+
+    def on_update(self):
+        self.clear_items()
+        for index in range(len(self.stream)):
+            self.add_column_object(index, None, text=self.stream.title(index), callback=self.open_document(index))
+
+    def on_close(self):
+        self.next(PopupPage("Exit with Save", return_key='exit', ptype='select', items=['Yes', 'No', 'Cancel']))
+        return True
+
+class FileListPage(ListPage):
+    def __init__(self, name, workspace):
+        super().__init__(name)
+        self.workspace = workspace
+        self.workspace.on_prepared = lambda index: self.hwnd and self.hwnd.post_job(self.on_prepared, (index,))
+        self._opened = None
+
+    def __repr__(self):
+        return json.dumps({self.workspace.files[k].filename: v for k, v in self.workspace.changes.items()})
+
+    def status(self, index):
+        if index in self.workspace.changes:
+            return 'Modified'
+        result = self.workspace.results.get(index)
+        if result is None:
+            return '...'
+        elif self.workspace.files[index].stream:
+            return f'{len(self.workspace.files[index].stream)} documents'
+        return result['errors'] or 'Valid'
+
+    def open_file(self, index):
+        def callback(key):
+            try:
+                result = self.workspace.prepare(index)
+            except Exception as e:
+                self.warning(f'Failed to load file. ({e})', True)
+                return
+            file = self.workspace.files[index]
+            self._opened = index
+            if file.stream:
+                page = DocumentPickerPage(file.name, self.workspace.schema, file.stream, True, self.workspace.validator.schema)
+            else:
+                page = EditorPage(file.name, self.workspace.schema, file.document, True,
+                    self.workspace.validator.schema, json.loads(json.dumps(result['normalized'])), validated=result['validated'])
+            self.next(page)
+            self.workspace.prefetch(index)
+        return callback
+
+    def on_schema_changed(self, schema):
+        if self.workspace.reload_schema(schema):
+            self.workspace.prefetch(self.get_focus())
+
+    def child_schema(self, name):
+        return self.workspace.schema
+
+    def on_prepared(self, index):
+        if self.hwnd and self.hwnd.stack and self.hwnd.stack[-1] is self:
+            self.render()
+
+    def on_change_focus(self):
+        self.workspace.prefetch(self.get_focus())
+
+    def on_page_result(self, page):
+        if page.json:
+            if 'exit' in page.json:
+                key = page.json.get('exit')
+                if key.lower() == 'yes':
+                    self.hwnd.destroy()
+                elif key.lower() == 'no':
+                    self.hwnd.destroy(False)
+            elif self._opened is not None:
+                self.workspace.update(self._opened, json.loads(str(page)))
+                if self.workspace.changes:
+                    self.modified()
+        self._opened = None
+
+    def on_update(self):
+        self.clear_items()
+        for index, file in enumerate(self.workspace.files):
+            self.add_column_object(file.filename, None, text=self.status(index), callback=self.open_file(index))
+
     def on_close(self):
-        self.next(PopupPage("Exit with Save", return_key='exit', background=self.on_draw(), ptype='select', items=['Yes', 'No', 'Cancel']))
+        self.next(PopupPage("Exit with Save", return_key='exit', ptype='select', items=['Yes', 'No', 'Cancel']))
         return True
@@ -3,6 +3,7 @@ import cerberus_kind
 import json
 import inspect
 from pprint import pprint
+from cerberus.utils import mapping_hash
 warnings.simplefilter("ignore", UserWarning)
         
 class Validator(cerberus_kind.Validator):
@@ -11,3 +12,99 @@ class Validator(cerberus_kind.Validator):
 
     def _validate_multiline(self, constraint, field, value):
         '''For use YAML Editor'''
+
+    @classmethod
+    def prepare_schema(cls, schema):
+        ''' Validate schema and return expanded schema. '''
+        return dict(cls(schema).schema.schema)
+
+    @classmethod
+    def mark_prepared(cls, expanded):
+        ''' Register expanded schema as already validated (skip schema validation). '''
+        cls._valid_schemas.add((mapping_hash(expanded), mapping_hash(cls.types_mapping)))
+
+def flatten_errors(errors, path=()):
+    ''' Flatten cerberus error tree into list of (path, message). '''
+    output = []
+    if isinstance(errors, str):
+        output.append((path, errors))
+    elif isinstance(errors, dict):
+        if not path and '__root__' in errors:
+            return flatten_errors(errors['__root__'], path)
+        for k, v in errors.items():
+            if isinstance(k, str) and 'oneof' in k:
+                continue    # Same as cerberus_kind.utils.parse_error
+            output += flatten_errors(v, path + (k,))
+    elif isinstance(errors, list):
+        for item in errors:
+            output += flatten_errors(item, path)
+    return output
+
+def format_error(path, message):
+    return f"{'.'.join(map(str, path))}: {message}" if path else message
+
+def field_errors(errors, key):
+    ''' Errors of field from cerberus error tree (messages and error trees of children). '''
+    if '__root__' in errors:
+        return [item for _ in errors['__root__'] if isinstance(_, dict) for item in _.get(key, [])]
+    return list(errors.get(key, []))
+
+def child_errors(errors, key, schema):
+    ''' Error tree of sub document at key, in the shape of validating it with schema. '''
+    items = field_errors(errors, key)
+    if '__root__' in schema:
+        return {'__root__': items} if items else {}
+    tree = {}
+    for _ in items:
+        if isinstance(_, dict):
+            for k, v in _.items():
+                tree.setdefault(k, []).extend(v)
+    return tree
+
+# Error Index
+# -- Validation errors indexed by document path
+# -- Error count of every prefix path for O(1) lookup of rows
+# -- Update errors of a sub tree incrementally
+class ErrorIndex:
+    def __init__(self, errors=None):
+        self.__entries = {}     # path -> [messages]
+        self.__counts = {}      # path prefix -> number of errors at or under it
+        if errors:
+            self.update(errors)
+
+    def __len__(self):
+        return self.__counts.get((), 0)
+
+    def __contains__(self, path):
+        return self.__counts.get(tuple(path), 0) > 0
+
+    def update(self, errors, prefix=()):
+        ''' Replace errors at or under prefix by cerberus errors (paths of errors include prefix). '''
+        prefix = tuple(prefix)
+        for path in [_ for _ in self.__entries if _[:len(prefix)] == prefix]:
+            self.__remove(path)
+        for path, message in flatten_errors(errors):
+            self.__add(path, message)
+
+    def __add(self, path, message):
+        self.__entries.setdefault(path, []).append(message)
+        for i in range(len(path)+1):
+            self.__counts[path[:i]] = self.__counts.get(path[:i], 0) + 1
+
+    def __remove(self, path):
+        count = len(self.__entries.pop(path))
+        for i in range(len(path)+1):
+            self.__counts[path[:i]] -= count
+            if not self.__counts[path[:i]]:
+                del self.__counts[path[:i]]
+
+    def get(self, path):
+        ''' Messages of exact path. '''
+        return list(self.__entries.get(tuple(path), []))
+
+    def items(self, prefix=()):
+        prefix = tuple(prefix)
+        return [(k, v) for k, v in self.__entries.items() if k[:len(prefix)] == prefix]
+
+    def message(self, prefix=()):
+        return ', '.join(format_error(path, _) for path, messages in self.items(prefix) for _ in messages)
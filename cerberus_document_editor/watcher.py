@@ -0,0 +1,47 @@
+import os
+import threading
+from .debug import log
+
+# File Watcher
+# -- Poll mtime/size of files in background
+# -- Call callback when any of them is changed
+class FileWatcher:
+    def __init__(self, files, callback, interval=1.):
+        self.files = files      # List of filenames or function returns them.
+        self.callback = callback
+        self.interval = interval
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def __files(self):
+        return self.files() if callable(self.files) else self.files
+
+    @staticmethod
+    def stat(filename):
+        try:
+            stat = os.stat(filename)
+            return (stat.st_mtime, stat.st_size)
+        except OSError:
+            return None
+
+    def snapshot(self):
+        return {_: self.stat(_) for _ in self.__files()}
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__watch, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stopped.set()
+
+    def __watch(self):
+        latest = self.snapshot()
+        while not self.__stopped.wait(self.interval):
+            current = {_: self.stat(_) for _ in latest}
+            if current != latest:
+                try:
+                    self.callback()
+                except Exception as e:
+                    log(f'Failed to handle file change: {e}')
+                latest = self.snapshot()    # Included files may be changed.
@@ -0,0 +1,170 @@
+import os
+import glob
+import json
+import queue
+import threading
+from cerberus_kind.utils import parse_error
+from . import yaml_parser
+from .roundtrip import SourceMap
+from .stream import DocumentStream
+from .lazy import LazyDocument
+from .validator import Validator
+from .debug import log
+
+SUPPORT_EXTENSIONS = ['.yaml', '.yml', '.json']
+
+def expand_filenames(patterns):
+    filenames = []
+    for pattern in patterns:
+        matched = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        filenames += [_ for _ in matched if not _ in filenames]
+    return filenames
+
+# Document File
+# -- Load YAML(single/multi document) or JSON file
+# -- Save with full dump or source patch (roundtrip)
+# -- Index top level entries only in fast-open mode (lazy)
+class DocumentFile:
+    def __init__(self, filename, roundtrip=False, lazy=False):
+        self.filename = filename
+        self.ext = os.path.splitext(filename)[1].lower()
+        self.roundtrip = roundtrip
+        self.document = None
+        self.source_map = None
+        self.stream = None
+        self.fast_open = lazy
+        self.lazy = None        # LazyDocument of fast-open mode
+        self.loaded = False
+        if not self.ext in SUPPORT_EXTENSIONS:
+            raise TypeError('Not support document file type.')
+
+    @property
+    def name(self):
+        return os.path.basename(self.filename)
+
+    def load(self):
+        if self.loaded:
+            return self
+        if os.path.exists(self.filename):
+            with open(self.filename) as f:
+                if self.ext in ['.yaml', '.yml']:
+                    text = f.read()
+                    stream = DocumentStream(text, roundtrip=self.roundtrip)
+                    lazy = self.fast_open and len(stream) == 1 and LazyDocument(text, self.roundtrip)
+                    if len(stream) > 1:
+                        self.stream = stream
+                    elif lazy and lazy.enabled:
+                        self.lazy = lazy
+                        self.document = lazy.document()
+                    else:
+                        # Uncached load, so the source text is not kept after parsing.
+                        self.document = yaml_parser.load_with_variables(text)[0]
+                        if self.roundtrip:
+                            self.source_map = SourceMap(text)
+                else:
+                    self.document = json.load(f)
+        else:
+            self.document = {}
+        self.loaded = True
+        return self
+
+    def dumps(self, modified):
+        if self.stream:
+            return self.stream.dump()
+        elif self.lazy:
+            return self.lazy.dumps(modified)
+        elif self.ext in ['.yaml', '.yml']:
+            return (self.source_map and self.source_map.patch(self.document, modified)) or yaml_parser.dump(modified)
+        else:
+            return json.dumps(modified, indent=2)
+
+    def save(self, modified):
+        with open(self.filename, 'wt') as f:
+            f.write(self.dumps(modified))
+
+# Workspace
+# -- Parse and prepare schema once for many files
+# -- Prefetch (load, normalize, validate) neighbour files in background
+# -- Keep the results to open prefetched file without validating again
+class Workspace:
+    def __init__(self, schema, filenames, roundtrip=False, prefetch=2):
+        self.schema = schema
+        self.validator = Validator(schema, purge_unknown=True)
+        self.files = [DocumentFile(_, roundtrip) for _ in filenames]
+        self.radius = prefetch
+        self.results = {}
+        self.changes = {}
+        self.on_prepared = None
+        self.__locks = [threading.Lock() for _ in self.files]
+        self.__queue = queue.Queue()
+        self.__worker = None
+
+    def __len__(self):
+        return len(self.files)
+
+    def new_validator(self):
+        # Share prepared(validated, expanded) schema.
+        return Validator(self.validator.schema, purge_unknown=True)
+
+    def reload_schema(self, schema):
+        ''' Replace schema and drop prefetched results. Return True if changed. '''
+        if schema == self.schema:
+            return False
+        self.schema = schema
+        self.validator = Validator(schema, purge_unknown=True)
+        self.results = {}
+        return True
+
+    def prepare(self, index, validator=None):
+        with self.__locks[index]:
+            if not index in self.results:
+                file = self.files[index].load()
+                result = {'normalized': None, 'validated': None, 'errors': None}
+                if not file.stream:
+                    validator = validator or self.new_validator()
+                    document = json.loads(json.dumps(file.document))
+                    normalized = validator.normalized(document, ordered=True) or document
+                    result['normalized'] = json.loads(json.dumps(normalized))
+                    valid = validator.validate(result['normalized'], normalize=False)
+                    result['validated'] = (valid, {} if valid else validator.errors)
+                    if not valid:
+                        result['errors'] = parse_error(validator.errors, with_path=True)
+                self.results[index] = result
+            return self.results[index]
+
+    def prefetch(self, index):
+        if self.__worker is None:
+            self.__worker = threading.Thread(target=self.__prefetch_worker, daemon=True)
+            self.__worker.start()
+        for i in sorted(range(index-self.radius, index+self.radius+1), key=lambda x: abs(x-index)):
+            if 0 <= i < len(self.files) and not i in self.results:
+                self.__queue.put(i)
+
+    def __prefetch_worker(self):
+        validator = self.new_validator()
+        while True:
+            index = self.__queue.get()
+            if index in self.results:
+                continue
+            if validator.schema is not self.validator.schema:
+                validator = self.new_validator()     # Schema reloaded.
+            try:
+                self.prepare(index, validator)
+                if self.on_prepared:
+                    self.on_prepared(index)
+            except Exception as e:
+                log(f'Failed to prefetch {self.files[index].filename}: {e}')
+
+    def update(self, index, document):
+        file = self.files[index]
+        if file.stream:
+            if file.stream.is_modified:
+                self.changes[index] = None
+        elif document != file.document:
+            self.changes[index] = document
+        else:
+            self.changes.pop(index, None)
+
+    def save(self):
+        for index, document in self.changes.items():
+            self.files[index].save(document)
@@ -3,32 +3,62 @@ import io
 import re
 import yaml
 try:
-    from yaml import CLoader as BaseLoader, CDumper as Dumper
+    from yaml import CLoader as BaseLoader, CDumper as BaseDumper
 except ImportError:
-    from yaml import Loader as BaseLoader, Dumper
+    from yaml import Loader as BaseLoader, Dumper as BaseDumper
+from collections import OrderedDict
 from functools import lru_cache
 
 class Loader(BaseLoader):
+    ''' Interpolate ${VAR} only for scalars marked with !interp. '''
     def __init__(self, stream):
         super(Loader, self).__init__(stream)
+        self.environ = dict(os.environ)     # Snapshot once per load.
+        self.variables = {}                 # Used variables: name -> value (None if not set)
 
     interpolation_matcher = re.compile(r'\$\{([\w.-]+)(|:-([^}^{]+))\}')
     def interpolation(self, node):
         ''' Extract the matched value, expand env variable, and replace the match '''
         value = node.value
         match = self.interpolation_matcher.match(value)
+        if not match:
+            return value
         env_var = match.group(1)
         default = match.group(3) or value
-        if not env_var.startswith('.'):
-            return os.environ.get(env_var, default) + value[match.end():]
-        else:
-            return os.environ.get(env_var, default) + value[match.end():]
+        self.variables[env_var] = self.environ.get(env_var)
+        return self.environ.get(env_var, default) + value[match.end():]
 
-Loader.add_implicit_resolver('!interp', Loader.interpolation_matcher, None)
 Loader.add_constructor('!interp', Loader.interpolation)
 
+class SchemaLoader(Loader):
+    ''' Interpolate every plain scalar starts with ${VAR} (for schema files). '''
+
+# Only scalars starting with '$' are matched against interpolation_matcher.
+SchemaLoader.add_implicit_resolver('!interp', Loader.interpolation_matcher, ['$'])
+
+class Dumper(BaseDumper):
+    ''' Dump OrderedDict (normalized document) as plain mapping. '''
+
+Dumper.add_representer(OrderedDict, lambda dumper, data: dumper.represent_dict(data))
+
+def dependencies(filename):
+    ''' Return filename and files included by !include recursively. '''
+    files = [filename]
+    for filename in files:
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                for _ in re.finditer(r'!include\s+([\w.-]+)', f.read()):
+                    path = os.path.join(os.getcwd(), _.group(1))
+                    if not path in files:
+                        files.append(path)
+    return files
+
 @lru_cache(maxsize=None)
-def load(file):
+def load(file, interpolation=False):
+    return load_with_variables(file, interpolation)[0]
+
+def load_with_variables(file, interpolation=False):
+    ''' Return loaded data and environment variables used by interpolation. '''
     def sub_load(file):
         if isinstance(file, io.IOBase):
             stream = file.read()
@@ -49,7 +79,11 @@ def load(file):
                 if not k.startswith('x-'):
                     _data[k] = v
         return _data
-    return drop_recursive(yaml.load(sub_load(file), Loader=Loader))
+    loader = (SchemaLoader if interpolation else Loader)(sub_load(file))
+    try:
+        return drop_recursive(loader.get_single_data()), loader.variables
+    finally:
+        loader.dispose()
 
 def dump(doc):
     return yaml.dump(doc, Dumper=Dumper, default_flow_style=False, sort_keys=False)
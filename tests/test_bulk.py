@@ -0,0 +1,65 @@
+import io
+import sys
+import json
+import pytest
+from cerberus_document_editor import __main__ as cli
+from cerberus_document_editor.bulk import BulkImport, detect_format, read_rows, write_rows, cast
+from cerberus_document_editor.validator import Validator
+
+ITEM = {'type': 'dict', 'schema': {
+    'name': {'type': 'string', 'required': True, 'order': 0},
+    'scale': {'type': 'integer', 'default': 1, 'order': 1},
+    'enabled': {'type': 'boolean', 'order': 2},
+    'ports': {'type': 'list', 'order': 3},
+}}
+
+def test_detect_format():
+    assert detect_format('rows.ndjson') == 'jsonl'
+    assert detect_format('rows.CSV') == 'csv'
+    assert detect_format('-') == 'jsonl'
+    assert detect_format('-', 'csv') == 'csv'
+    with pytest.raises(TypeError):
+        detect_format('rows.txt')
+
+def test_cast():
+    assert cast('Yes', {'type': 'boolean'}) is True and cast('off', {'type': 'boolean'}) is False
+    assert cast('[1, 2]', {'type': 'list'}) == [1, 2]
+    with pytest.raises(ValueError):
+        cast('maybe', {'type': 'boolean'})
+
+def test_csv_round_trip():
+    items = [{'name': 'a', 'scale': 2, 'enabled': True, 'ports': [80]}, {'name': 'b'}]
+    f = io.StringIO()
+    assert write_rows(f, 'csv', ITEM, items) == 2
+    assert f.getvalue().splitlines()[0] == 'name,scale,enabled,ports'
+    f.seek(0)
+    assert [item for number, item, error in read_rows(f, 'csv', ITEM)] == items
+
+def test_batches_report_rows():
+    rows = io.StringIO('{"name": "a"}\n\nnot json\n{"scale": 2}\n{"name": "b", "scale": 3}\n')
+    bulk = BulkImport(Validator({}, purge_unknown=True), ITEM, batch_size=2)
+    errors = []
+    batches = list(bulk.operations(read_rows(rows, 'jsonl', ITEM), ['items'], 5, lambda number, error: errors.append(number)))
+    assert batches == [
+        [{'op': 'insert', 'path': ['items', 5], 'new': {'name': 'a', 'scale': 1}}],
+        [{'op': 'insert', 'path': ['items', 6], 'new': {'name': 'b', 'scale': 3}}],
+    ]
+    assert errors == [3, 4] and (bulk.accepted, bulk.rejected) == (2, 2)
+
+def test_import_and_export_command(tmp_path, monkeypatch, capsys):
+    schema = tmp_path / 'schema.json'
+    schema.write_text(json.dumps({'items': {'type': 'list', 'schema': ITEM}}))
+    document = tmp_path / 'document.yaml'
+    document.write_text('items:\n- name: a\n')
+    rows = tmp_path / 'rows.jsonl'
+    rows.write_text('{"name": "b"}\n{"scale": 1}\n')
+    monkeypatch.setattr(sys, 'stdin', rows.open())     # Read from '-'
+    monkeypatch.setattr(sys, 'argv', ['cde', 'import', '-s', str(schema), '-f', 'items', '--errors', str(tmp_path / 'errors.jsonl'), str(document), '-'])
+    with pytest.raises(SystemExit) as e:
+        cli.main()
+    assert e.value.code == 1
+    assert json.loads((tmp_path / 'errors.jsonl').read_text()) == {'row': 2, 'errors': ['name: required field']}
+    rows = tmp_path / 'rows.csv'
+    monkeypatch.setattr(sys, 'argv', ['cde', 'export', '-s', str(schema), '-f', 'items', str(document), str(rows)])
+    cli.main()
+    assert rows.read_text().splitlines() == ['name,scale,enabled,ports', 'a,1,,', 'b,1,,']
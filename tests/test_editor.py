@@ -0,0 +1,19 @@
+import threading
+from cerberus_document_editor.editor import MainWindow
+from cerberus_document_editor.page import PopupPage
+from cerberus_document_editor.replay import VirtualScreen
+
+def test_post_job_wakes_up_main_loop():
+    app = MainWindow('test')
+    called = []
+    def finish():
+        called.append(threading.current_thread())
+        app.destroy(False)
+    # No input and no alarm: main loop waits until the posted job wakes it up.
+    timer = threading.Timer(0.1, app.post_job, (finish,))
+    timer.start()
+    watchdog = threading.Timer(5, lambda: called or app.post_job(app.destroy, (False,)))
+    watchdog.start()
+    app.run(PopupPage('Test', ptype='message', items=['message']), screen=VirtualScreen((40, 10)))
+    watchdog.cancel()
+    assert called == [threading.main_thread()]
@@ -0,0 +1,30 @@
+import copy
+from cerberus_document_editor.hashing import SubtreeHash
+from cerberus_document_editor.journal import apply_operation
+
+DOCUMENT = {'app': {'web': {'image': 'python', 'ports': [80, 443]}, 'db': {'image': 'postgres'}}, 'name': 'demo'}
+
+def test_digest_ignores_key_order():
+    reordered = {'name': 'demo', 'app': {'db': {'image': 'postgres'}, 'web': {'ports': [80, 443], 'image': 'python'}}}
+    assert SubtreeHash(DOCUMENT).digest() == SubtreeHash(reordered).digest()
+    assert SubtreeHash(DOCUMENT).digest(('app', 'web', 'ports')) != SubtreeHash({**DOCUMENT, 'app': {
+        'web': {'image': 'python', 'ports': [443, 80]}, 'db': {'image': 'postgres'}}}).digest(('app', 'web', 'ports'))
+
+def test_update_matches_fresh_hash():
+    document = copy.deepcopy(DOCUMENT)
+    hashes = SubtreeHash(document)
+    db = hashes.digest(('app', 'db'))
+    hashes.digest()
+    hashes.digest(('app', 'web', 'ports', 1))
+    for op in [
+        {'op': 'set', 'path': ['app', 'web', 'image'], 'new': 'alpine'},
+        {'op': 'insert', 'path': ['app', 'web', 'ports', 0], 'new': 22},
+        {'op': 'move', 'path': ['app', 'web', 'ports', 2], 'to': 0},
+        {'op': 'delete', 'path': ['app', 'web', 'ports', 1]},
+        {'op': 'rename', 'path': ['app', 'web'], 'new': 'frontend'},
+    ]:
+        apply_operation(document, op)
+        hashes.update(op)
+        assert hashes.digest() == SubtreeHash(copy.deepcopy(document)).digest()
+    assert hashes.digest(('app', 'frontend', 'ports')) == SubtreeHash(document).digest(('app', 'frontend', 'ports'))
+    assert hashes.digest(('app', 'db')) == db
@@ -0,0 +1,56 @@
+from cerberus_document_editor.journal import Journal, apply_operation
+
+def test_apply_operation():
+    document = {'a': 1, 'c': 3, 'items': [1, 2]}
+    apply_operation(document, {'op': 'insert', 'path': ['b'], 'new': 2, 'before': 'c'})
+    apply_operation(document, {'op': 'rename', 'path': ['a'], 'new': 'z'})
+    apply_operation(document, {'op': 'move', 'path': ['items', 1], 'to': 0})
+    apply_operation(document, {'op': 'set', 'path': ['items', 2], 'new': 3})
+    apply_operation(document, {'op': 'set', 'path': ['new', 'key'], 'new': 1})
+    assert document == {'z': 1, 'b': 2, 'c': 3, 'items': [2, 1, 3], 'new': {'key': 1}}
+    assert list(document) == ['z', 'b', 'c', 'items', 'new']
+
+def write(filename, text):
+    filename.write_text(text)
+    return str(filename)
+
+def test_recover_unsaved_edits(tmp_path):
+    filename = write(tmp_path / 'document.yaml', 'name: a\n')
+    journal = Journal(filename)
+    journal.start({'name': 'a'})
+    journal.record('set', ['name'], new='b')
+    journal.record('insert', ['items'], new=[1])
+    journal.close(discard=False)
+    assert Journal(filename).exists()
+    assert Journal(filename).recover({'name': 'a'}) == {'name': 'b', 'items': [1]}
+    journal.close(discard=True)
+    assert not Journal(filename).exists()
+
+def test_recover_after_compaction_and_partial_line(tmp_path):
+    filename = write(tmp_path / 'document.yaml', 'count: 0\n')
+    journal = Journal(filename, compact_every=2)
+    journal.start({'count': 0})
+    for count in range(1, 6):
+        journal.record('set', ['count'], new=count)
+    journal.close(discard=False)
+    with open(journal.journal_path, 'a') as f:
+        f.write('{"op": "set", "path": ["co')     # Crashed while writing.
+    assert Journal(filename).recover({'count': 0}) == {'count': 5}
+
+def test_stale_journal_is_ignored(tmp_path):
+    filename = write(tmp_path / 'document.yaml', 'name: a\n')
+    journal = Journal(filename)
+    journal.start({'name': 'a'})
+    journal.record('set', ['name'], new='b')
+    journal.close(discard=False)
+    write(tmp_path / 'document.yaml', 'name: changed outside\n')
+    assert Journal(filename).recover({'name': 'changed outside'}) is None
+
+def test_multi_document_stream(tmp_path):
+    filename = write(tmp_path / 'stream.yaml', 'a: 1\n---\na: 2\n')
+    journal = Journal(filename, multi=True)
+    documents = {0: {'a': 1}, 1: {'a': 2}}
+    journal.start(loader=documents.get)
+    journal.record('set', [1, 'a'], new=3)
+    journal.close(discard=False)
+    assert Journal(filename, multi=True).recover(loader=documents.get) == {1: {'a': 3}}
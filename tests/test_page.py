@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+from cerberus_document_editor.editor import MainWindow
+from cerberus_document_editor.user_page import EditorPage, FileListPage
+from cerberus_document_editor.workspace import Workspace
+from cerberus_document_editor.replay import VirtualScreen
+
+SCHEMA = {
+    'name': {'type': 'string', 'order': 0},
+    'config': {'type': 'dict', 'order': 1, 'schema': {'port': {'type': 'integer', 'default': 80}}},
+}
+
+def run(page, location=None, check=None):
+    app = MainWindow('test')
+    def start():
+        check and check(app)
+        app.destroy(False)
+    app.run(page, screen=VirtualScreen((60, 10), on_start=start), location=location)
+    return app
+
+def test_restore_enters_sub_page():
+    app = run(EditorPage('document', SCHEMA, {'name': 'a', 'config': {}}), [['document', 'config'], ['config', 'port']])
+    assert app.last_location == [['document', 'config'], ['config', 'port']]
+
+def test_open_item_of_value_row():
+    def check(app):
+        assert not app.stack[-1].open_item('name')
+        assert not app.stack[-1].open_item('unknown')
+    app = run(EditorPage('document', SCHEMA, {'name': 'a', 'config': {}}), check=check)
+    assert app.last_location == [['document', 'name']]
+
+def test_open_item_of_file_list(tmp_path):
+    filename = tmp_path / 'a.yaml'
+    filename.write_text('name: a\n')
+    opened = []
+    run(FileListPage('files', Workspace(SCHEMA, [str(filename)])), check=lambda app: opened.append(app.stack[-1].open_item(str(filename))))
+    assert opened == [False]
+
+def apps_schema(keysrules):
+    return {'__root__': {'type': 'dict', 'keysrules': keysrules, 'valuesrules': {'type': 'dict', 'schema': {'image': {'type': 'string'}}}}}
+
+def test_duplicate_key_follows_keysrules():
+    schema = apps_schema({'type': 'string', 'regex': '^([a-z]+[a-z0-9\\-]*[a-z0-9]+|[a-z0-9])$'})
+    def check(app):
+        page = app.stack[-1]
+        for _ in range(2):
+            page.focus_item('web')
+            page.duplicate_selected()
+        assert list(page.session.document) == ['web', 'web-copy', 'web-copy-2']
+        assert page.session.validate()
+    run(EditorPage('apps', schema, {'web': {'image': 'x'}}), check=check)
+
+def test_duplicate_asks_name_if_not_derived():
+    schema = apps_schema({'type': 'string', 'maxlength': 5})
+    def check(app):
+        page = app.stack[-1]
+        page.focus_item('web')
+        page.duplicate_selected()
+        assert app.stack[-1].is_modal and list(page.session.document) == ['web']
+        page.on_page_result(SimpleNamespace(json={'duplicate': 'api'}))
+        assert page.session.document == {'web': {'image': 'x'}, 'api': {'image': 'x'}}
+    run(EditorPage('apps', schema, {'web': {'image': 'x'}}), check=check)
+
+def test_typed_keys_are_committed_once():
+    changes = []
+    def check(app):
+        page = app.stack[-1]
+        on_change = page.on_change
+        page.on_change = lambda widget, value: (changes.append(value), on_change(widget, value))
+        page.focus_item('name')
+        app.loop.process_input(list('bcd'))
+        assert changes == [] and page.session.get(['name']) == 'a'
+        # Committed by main loop job once for all keys.
+        app.add_job(lambda: (changes.append(page.session.get(['name'])), app.destroy(False)))
+    app = MainWindow('test')
+    app.run(EditorPage('document', SCHEMA, {'name': 'a', 'config': {}}),
+        screen=VirtualScreen((60, 10), on_start=lambda: check(app)))
+    assert changes == ['abcd', 'abcd']
+
+def test_filter_narrows_rows():
+    apps = {'web': {'image': 'x'}, 'api': {'image': 'x'}, 'worker': {'image': 'x'}}
+    def check(app):
+        page = app.stack[-1]
+        walker = page._page_widget.body
+        page.open_filter()
+        page._filter_edit.set_edit_text('w')
+        assert [page.row_keys[_] for _ in walker.positions()] == ['web', 'worker']
+        page._filter_edit.set_edit_text('wo')
+        assert [page.row_keys[_] for _ in walker.positions()] == ['worker']
+        assert page.row_keys[walker.get_focus()[1]] == 'worker'
+        page._filter_edit.set_edit_text('x')
+        assert list(walker.positions()) == [] and walker.get_focus() == (None, None)
+        page.close_filter()
+        assert [page.row_keys[_] for _ in walker.positions()] == list(apps)
+    run(EditorPage('apps', apps_schema({'type': 'string'}), apps), check=check)
+
+def test_marks_select_keys():
+    apps = {'web': {'image': 'x'}, 'api': {'image': 'x'}, 'worker': {'image': 'x'}}
+    def check(app):
+        page = app.stack[-1]
+        page.focus_item('api')
+        assert page.selected_keys() == ['api']
+        page.toggle_mark()
+        page.mark_range(1)
+        assert page.selected_keys() == ['api', 'worker']
+        page.toggle_mark()
+        assert page.selected_keys() == ['api']
+        page.mark_all()
+        assert page.marked == set() and page.selected_keys() == ['worker']  # Focused key if nothing is marked.
+        page.mark_all()
+        assert page.selected_keys() == list(apps)
+    run(EditorPage('apps', apps_schema({'type': 'string'}), apps), check=check)
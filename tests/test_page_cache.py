@@ -0,0 +1,21 @@
+from cerberus_document_editor.page_cache import PageCache
+
+def test_page_is_dropped_when_version_changes():
+    cache = PageCache()
+    cache.put(('app',), 'v1', 'page')
+    assert cache.get(('app',), 'v1') == 'page'
+    assert cache.get(('app',), 'v2') is None
+    assert len(cache) == 0
+    assert cache.get(('app',), 'v1') is None
+
+def test_least_recently_used_page_is_evicted():
+    cache = PageCache(capacity=2)
+    cache.put(('a',), 1, 'a')
+    cache.put(('b',), 1, 'b')
+    assert cache.get(('a',), 1) == 'a'
+    cache.put(('c',), 1, 'c')
+    assert len(cache) == 2
+    assert cache.get(('b',), 1) is None
+    assert cache.get(('a',), 1) == 'a' and cache.get(('c',), 1) == 'c'
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,29 @@
+import os
+import pytest
+from cerberus_document_editor import parallel
+from cerberus_document_editor.parallel import ParallelList
+from cerberus_document_editor.validator import Validator
+
+SCHEMA = {'__root__': {'type': 'list', 'maxlength': 5, 'schema': {
+    'type': 'dict', 'schema': {'name': {'type': 'string'}, 'scale': {'type': 'integer', 'default': 1}},
+}}}
+
+@pytest.mark.skipif(not hasattr(os, 'sched_getaffinity'), reason='No CPU affinity')
+def test_workers_follow_cpu_affinity(monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0, 1, 2})
+    assert parallel.cpu_count() == 3
+    assert ParallelList(SCHEMA).workers == 3
+
+def test_same_result_as_whole_list():
+    document = [{'name': f'item{i}'} for i in range(7)] + [{'name': 1}]
+    items = ParallelList(SCHEMA, workers=2, chunk_size=3, threshold=4)
+    try:
+        assert items.accept(document)
+        normalized = items.normalized(document)
+        validator = Validator(SCHEMA, purge_unknown=True)
+        assert normalized == validator.normalized(document, ordered=True)
+        assert not validator.validate(normalized, normalize=False)
+        assert items.validate(normalized) == (False, validator.errors)
+    finally:
+        ParallelList.shutdown()
+    assert not ParallelList._ParallelList__pools
@@ -0,0 +1,55 @@
+import json
+import yaml
+from cerberus_document_editor.roundtrip import SourceMap
+
+SOURCE = '''\
+base: &anc
+  a: 1   # comment
+  b: 2
+other: *anc
+x: 1
+'''
+
+def edited(text, **changes):
+    original = yaml.safe_load(text)
+    modified = json.loads(json.dumps(original))
+    for path, value in changes.items():
+        parent = modified
+        keys = path.split('__')
+        for key in keys[:-1]:
+            parent = parent[key]
+        parent[keys[-1]] = value
+    return original, modified
+
+def test_patch_keeps_comments():
+    original, modified = edited(SOURCE, x=2)
+    text = SourceMap(SOURCE).patch(original, modified)
+    assert text == SOURCE.replace('x: 1', 'x: 2')
+
+def test_anchor_and_alias_are_opaque():
+    source_map = SourceMap(SOURCE)
+    assert ('base',) in source_map.opaque
+    assert ('other',) in source_map.opaque
+    for path in ['base__a', 'other__b']:
+        original, modified = edited(SOURCE, **{path: 5})
+        assert source_map.patch(original, modified) is None
+
+def test_anchored_scalar_is_opaque():
+    text = 'a: &v 1\nb: *v\n'
+    original, modified = edited(text, a=2)
+    assert SourceMap(text).patch(original, modified) is None
+
+def test_session_save_keeps_comments_of_reordered_keys(tmp_path):
+    from cerberus_document_editor.session import DocumentSession
+    schema = {
+        'name': {'type': 'string', 'order': 0},
+        'version': {'type': 'string', 'order': 1},
+        'scale': {'type': 'integer', 'default': 1, 'order': 2},
+    }
+    filename = tmp_path / 'document.yaml'
+    filename.write_text('# header\nversion: 1.0.0   # version\nname: a   # name\n')
+    session = DocumentSession.open(str(filename), schema, roundtrip=True)
+    assert list(session.document) == ['name', 'version', 'scale']
+    session.set(['name'], 'b')
+    session.save()
+    assert filename.read_text() == '# header\nversion: 1.0.0   # version\nname: b   # name\nscale: 1\n'
@@ -0,0 +1,25 @@
+import os
+from cerberus_document_editor.schema_cache import SchemaCache
+from cerberus_document_editor import yaml_parser
+
+def test_cache_is_keyed_by_files_and_variables(tmp_path, monkeypatch):
+    monkeypatch.setenv('CDE_TEST_IMAGE', 'python')
+    filename = tmp_path / 'schema.yaml'
+    filename.write_text('image:\n  type: string\n  default: ${CDE_TEST_IMAGE}\n')
+    cache = SchemaCache(str(tmp_path / 'cache'))
+    loaded = []
+    def loader(filename):
+        loaded.append(filename)
+        with open(filename) as f:
+            return yaml_parser.load_with_variables(f, interpolation=True)
+
+    schema = cache.load(str(filename), loader)
+    assert schema == {'image': {'type': 'string', 'default': 'python'}}
+    assert cache.load(str(filename), loader) == schema and len(loaded) == 1
+
+    monkeypatch.setenv('CDE_TEST_IMAGE', 'alpine')
+    assert cache.load(str(filename), loader)['image']['default'] == 'alpine' and len(loaded) == 2
+
+    filename.write_text('image:\n  type: integer\n')
+    assert cache.load(str(filename), loader) == {'image': {'type': 'integer'}} and len(loaded) == 3
+    assert len(os.listdir(tmp_path / 'cache')) == 1     # Stale entry is removed.
@@ -0,0 +1,55 @@
+import json
+import socket
+import threading
+from cerberus_document_editor.server import SchemaStore, ValidationService, create_server
+
+SCHEMA = {
+    'name': {'type': 'string', 'required': True},
+    'scale': {'type': 'integer', 'default': 1},
+}
+
+def service(tmp_path):
+    filename = tmp_path / 'schema.json'
+    filename.write_text(json.dumps(SCHEMA))
+    return ValidationService(SchemaStore(lambda _: json.loads(open(_).read()), str(filename)))
+
+def call(service, method, params, id=1):
+    return service.handle({'jsonrpc': '2.0', 'id': id, 'method': method, 'params': params})
+
+def test_methods(tmp_path):
+    validation = service(tmp_path)
+    assert call(validation, 'normalize', {'document': {'name': 'a'}})['result'] == {'name': 'a', 'scale': 1}
+    assert call(validation, 'validate', [{'name': 'a'}])['result'] == {'valid': True, 'message': ''}
+    assert call(validation, 'errors', {'document': {}})['result'] == [{'path': ['name'], 'message': 'required field'}]
+    assert validation.handle({'jsonrpc': '2.0', 'method': 'validate', 'params': [{}]}) is None   # Notification
+
+def test_error_codes(tmp_path):
+    validation = service(tmp_path)
+    validation.methods['broken'] = lambda: None + 1
+    assert call(validation, 'missing', {})['error']['code'] == -32601
+    assert call(validation, 'validate', {'unknown': 1})['error']['code'] == -32602
+    assert call(validation, 'validate', [])['error']['code'] == -32602
+    assert call(validation, 'broken', [])['error']['code'] == -32603   # TypeError inside method
+
+def test_unknown_methods_share_metrics(tmp_path):
+    validation = service(tmp_path)
+    for i in range(10):
+        call(validation, f'missing{i}', {})
+    call(validation, 'validate', [{'name': 'a'}])
+    report = call(validation, 'metrics', [])['result']
+    assert set(report) == {'unknown', 'validate'}
+    assert report['unknown']['count'] == report['unknown']['errors'] == 10
+
+def test_newline_delimited_stream(tmp_path):
+    server = create_server(service(tmp_path), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with socket.create_connection(server.server_address) as sock:
+            f = sock.makefile('rwb')
+            f.write(b'{"jsonrpc": "2.0", "id": 7, "method": "validate", "params": [{"name": "a"}]}\nnot json\n')
+            f.flush()
+            assert json.loads(f.readline()) == {'jsonrpc': '2.0', 'id': 7, 'result': {'valid': True, 'message': ''}}
+            assert json.loads(f.readline())['error']['code'] == -32700
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,74 @@
+import yaml
+import pytest
+from types import SimpleNamespace
+from cerberus_document_editor.session import DocumentSession
+from cerberus_document_editor.user_page import EditorPage
+
+SCHEMA = {
+    'name': {'type': 'string', 'order': 0},
+    'app': {
+        'type': 'dict',
+        'order': 1,
+        'valuesrules': {
+            'type': 'dict',
+            'schema': {
+                'image': {'type': 'string', 'order': 0},
+                'scale': {'type': 'integer', 'default': 1, 'order': 1},
+            },
+        },
+    },
+}
+
+def test_saved_file_is_safe_yaml(tmp_path):
+    filename = tmp_path / 'document.yaml'
+    filename.write_text('name: a\napp:\n  web:\n    image: x\n')
+    session = DocumentSession.open(str(filename), SCHEMA)
+    session.set(['name'], 'b')
+    session.save()
+    assert yaml.safe_load(filename.read_text()) == {'name': 'b', 'app': {'web': {'image': 'x', 'scale': 1}}}
+
+def test_saved_roundtrip_file_is_safe_yaml(tmp_path):
+    filename = tmp_path / 'document.yaml'
+    filename.write_text('name: a  # comment\napp: {}\n')
+    session = DocumentSession.open(str(filename), SCHEMA, roundtrip=True)
+    session.set(['app', 'web'], {'image': 'x'})
+    session.save()
+    text = filename.read_text()
+    assert '# comment' in text
+    assert yaml.safe_load(text) == {'name': 'a', 'app': {'web': {'image': 'x', 'scale': 1}}}
+
+KIND_SCHEMA = {
+    'workspace': {
+        'type': 'dict',
+        'order': 0,
+        'selector': {
+            'dockerfile': {'filePath': {'type': 'string', 'default': 'Dockerfile'}},
+            'buildscript': {'buildscript': {'type': 'string'}},
+        },
+    },
+    'app': dict(SCHEMA['app'], order=1),
+}
+
+def test_add_selector_and_dict_entries():
+    page = EditorPage('document', KIND_SCHEMA, {})
+    for key in ['workspace', 'app']:
+        page.on_page_result(SimpleNamespace(json={'popup': key}))
+    assert page.session.document == {'workspace': {'kind': 'Dockerfile', 'filePath': 'Dockerfile'}, 'app': {}}
+
+def test_failed_batch_leaves_document_unchanged():
+    session = DocumentSession(SCHEMA, {'name': 'a', 'app': {'server': {'image': 'x'}, 'client': {'image': 'y'}}})
+    document, result, digest = session.document, session.result, session.digest()
+    with pytest.raises(ValueError):
+        session.apply([
+            {'op': 'set', 'path': ['name'], 'new': 'b'},
+            {'op': 'set', 'path': ['app', 'server', 'image'], 'new': 'z'},
+            {'op': 'move', 'path': ['app', 'client'], 'to': 0},
+        ])
+    for path in [['unknown', 'key'], ['name', 'key']]:
+        with pytest.raises(ValueError):
+            session.apply([{'op': 'delete', 'path': path}])
+    assert session.document is document
+    assert session.get(['name']) == 'a' and session.get(['app', 'server', 'image']) == 'x'
+    assert session.digest() == digest and session.result == result
+    session.apply([{'op': 'set', 'path': ['app', 'server', 'image'], 'new': 'z'}])
+    assert session.get(['app', 'server', 'image']) == 'z' and session.is_modified
@@ -0,0 +1,23 @@
+from cerberus_document_editor.stream import DocumentStream
+
+SOURCE = '''\
+kind: A
+name: first
+---
+kind: B
+name: second
+'''
+
+def test_documents_are_parsed_separately():
+    stream = DocumentStream(SOURCE)
+    assert len(stream) == 2
+    assert stream.title(1) == 'B/second'
+    assert stream.document(0) == {'kind': 'A', 'name': 'first'}
+
+def test_same_source_is_not_shared():
+    first, second = DocumentStream(SOURCE), DocumentStream(SOURCE)
+    document = first.document(0)
+    document['name'] = 'changed'
+    first.update(0, document)
+    assert second.document(0)['name'] == 'first'
+    assert first.dump() == SOURCE.replace('name: first', 'name: changed')
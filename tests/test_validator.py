@@ -0,0 +1,25 @@
+from cerberus_document_editor.validator import ErrorIndex
+
+ERRORS = {
+    'app': [{'web': [{'image': ['must be of string type']}], 'db': [{'port': ['min value is 1']}]}],
+    'name': ['required field'],
+}
+
+def test_error_index_counts_prefixes():
+    index = ErrorIndex(ERRORS)
+    assert len(index) == 3
+    assert ('app',) in index and ('app', 'web') in index and ('name',) in index
+    assert ('app', 'cache') not in index
+    assert index.get(('app', 'web', 'image')) == ['must be of string type']
+    assert index.get(('app',)) == []
+    assert sorted(_ for _, __ in index.items(('app',))) == [('app', 'db', 'port'), ('app', 'web', 'image')]
+
+def test_error_index_updates_sub_tree():
+    index = ErrorIndex(ERRORS)
+    index.update({'app': [{'web': [{'image': ['must be of string type']}]}]}, prefix=('app',))
+    assert len(index) == 2
+    assert ('app', 'db') not in index and ('app', 'web') in index and ('name',) in index
+
+    index.update({}, prefix=('app',))
+    assert len(index) == 1 and ('app',) not in index
+    assert index.message() == 'name: required field'
@@ -0,0 +1,27 @@
+from cerberus_document_editor.workspace import Workspace
+from cerberus_document_editor.session import DocumentSession
+
+SCHEMA = {
+    'name': {'type': 'string', 'required': True},
+    'count': {'type': 'integer', 'default': 1},
+}
+
+def test_prepared_result_is_reused(tmp_path, monkeypatch):
+    filename = tmp_path / 'a.yaml'
+    filename.write_text('count: x\n')
+    workspace = Workspace(SCHEMA, [str(filename)])
+    result = workspace.prepare(0)
+    valid, errors = result['validated']
+    assert not valid and set(errors) == {'name', 'count'}
+
+    session = DocumentSession(SCHEMA, workspace.files[0].document, workspace.validator.schema,
+        result['normalized'], validated=result['validated'])
+    monkeypatch.setattr(session.validator, 'validate', lambda *args, **kwargs: 1/0)
+    assert session.result == result['validated']
+
+def test_loaded_document_is_not_shared(tmp_path):
+    filename = tmp_path / 'a.yaml'
+    filename.write_text('name: a\n')
+    first, second = Workspace(SCHEMA, [str(filename)]), Workspace(SCHEMA, [str(filename)])
+    first.files[0].load().document['name'] = 'changed'
+    assert second.files[0].load().document == {'name': 'a'}